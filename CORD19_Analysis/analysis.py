@@ -1,101 +1,681 @@
 # analysis.py: Full data exploration, cleaning, and visualization script
+import argparse
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
 from datetime import datetime
-from wordcloud import WordCloud
 import os
 
-# Ensure plots save in current directory
-os.makedirs('plots', exist_ok=True)  # Optional: Create a plots folder
-
-print("=== Loading and Exploring CORD-19 Metadata ===")
-
-# Load the dataset (sample 10k rows for speed; adjust as needed)
-df = pd.read_csv('metadata.csv', low_memory=False).head(10000)
-
-# Basic info (as requested)
-print("Dataset Shape:", df.shape)
-print("\nData Types:")
-print(df.dtypes)
-print("\nBasic Stats:")
-print(df.describe(include='all'))
-
-# Check missing values (as requested)
-print("\nMissing Values per Column:")
-missing = df.isnull().sum()
-print(missing[missing > 0].sort_values(ascending=False))
-
-print("\nFirst 5 rows:")
-print(df.head())
-
-# Simple visualization example (as in your snippet)
-print("\n=== Basic Cleaning ===")
-df['publish_time'] = pd.to_datetime(df['publish_time'], errors='coerce')
-df['year'] = df['publish_time'].dt.year
-print("Year column added. Sample years:", df['year'].dropna().unique())
-
-# Drop rows with no title or publish_time, then handle invalid years
-df_clean = df.dropna(subset=['title', 'publish_time']).copy()
-df_clean['year'] = df_clean['publish_time'].dt.year
-df_clean = df_clean.dropna(subset=['year'])
-df_clean['year'] = df_clean['year'].astype(int)
-
-print(f"Cleaned Data Shape: {df_clean.shape}")
-print("Year Range:", df_clean['year'].min(), "to", df_clean['year'].max())
-
-# Explore key patterns
-print("\n=== Key Patterns ===")
-year_counts = df_clean['year'].value_counts().sort_index()
-print("Publications by Year:\n", year_counts)
-
-top_journals = df_clean['journal'].value_counts().head(10)
-print("\nTop 10 Journals:\n", top_journals)
-
-# Note: 'source_x' might vary; use 'source' if needed
-source_counts = df_clean.get('source_x', df_clean['source']).value_counts().head(5)
-print("\nTop 5 Sources:\n", source_counts)
-
-print("\n=== Generating Visualizations ===")
-
-# Viz 1: Publications by Year (Bar Plot)
-plt.figure(figsize=(10, 6))
-plt.bar(year_counts.index, year_counts.values, color='skyblue')
-plt.title('COVID-19 Publications by Year')
-plt.xlabel('Year')
-plt.ylabel('Number of Publications')
-plt.xticks(year_counts.index)
-plt.grid(axis='y', alpha=0.3)
-plt.savefig('publications_by_year.png', dpi=300, bbox_inches='tight')
-plt.show()  # Optional: Shows plot if running in an IDE with GUI
-print("Saved: publications_by_year.png")
-
-# Viz 2: Top Journals (Seaborn Bar Plot)
-plt.figure(figsize=(12, 6))
-sns.barplot(x=top_journals.values, y=top_journals.index, palette='viridis')
-plt.title('Top 10 Journals by Publication Count')
-plt.xlabel('Number of Publications')
-plt.tight_layout()
-plt.savefig('top_journals.png', dpi=300, bbox_inches='tight')
-plt.show()
-print("Saved: top_journals.png")
-
-# Viz 3: Word Cloud for Titles (Optional)
-print("Generating word cloud...")
-titles_text = ' '.join(df_clean['title'].dropna().astype(str).tolist())
-wordcloud = WordCloud(width=800, height=400, background_color='white').generate(titles_text)
-plt.figure(figsize=(10, 5))
-plt.imshow(wordcloud, interpolation='bilinear')
-plt.axis('off')
-plt.title('Word Cloud of Paper Titles')
-plt.savefig('title_wordcloud.png', dpi=300, bbox_inches='tight')
-plt.show()
-print("Saved: title_wordcloud.png")
-
-# Save cleaned data for Streamlit
-df_clean.to_csv('cleaned_metadata.csv', index=False)
-print("\n=== Done! ===")
-print("Cleaned data saved as 'cleaned_metadata.csv'")
-print("Plots saved as PNG files.")
-print("Run 'python streamlit_app.py' next for the app.")
\ No newline at end of file
+import cube
+import dates
+import dedup
+import figures
+import incremental
+import partitions
+import profiling
+import sampling
+import schema
+import search_index
+import snapshot
+import sketches
+import store
+import terms
+
+DATA_FILE = 'metadata.csv'
+DEFAULT_LIMIT = 10000       # Same sample size the script always used
+DEFAULT_CHUNKSIZE = 50000   # Rows per chunk in --stream mode
+
+
+def source_column(df):
+    """Return the name of the source column ('source_x' in newer releases)"""
+    return 'source_x' if 'source_x' in df.columns else 'source'
+
+
+def read_metadata(path=DATA_FILE, limit=None, chunksize=None):
+    """Read metadata.csv, stopping after `limit` rows; returns an iterator of chunks if chunksize is set"""
+    # Only the columns in the schema are parsed, with its compact dtypes
+    reader = pd.read_csv(path, nrows=limit, chunksize=chunksize, **schema.read_options())
+    if chunksize is None:
+        return schema.intern_categories(reader)
+    return (schema.intern_categories(chunk) for chunk in reader)
+
+
+def read_header(path=DATA_FILE):
+    """Every column name in metadata.csv, including the ones the schema skips"""
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+class _ByteRange:
+    """File wrapper that stops reading at byte `end`"""
+
+    def __init__(self, f, end):
+        self.f = f
+        self.end = end
+
+    def read(self, size=-1):
+        left = self.end - self.f.tell()
+        if left <= 0:
+            return b''
+        if size is None or size < 0 or size > left:
+            size = left
+        return self.f.read(size)
+
+
+def read_range(path, start, end, header=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield chunks of the records in path[start:end]
+
+    start must sit on a record boundary. When it isn't 0 the header line
+    isn't part of the range, so the column names have to be passed in.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        for chunk in pd.read_csv(_ByteRange(f, end), chunksize=chunksize, header=None if header else 'infer',
+                                 names=header, **schema.read_options()):
+            yield schema.intern_categories(chunk)
+
+
+# Shared by every chunk in this process, so each distinct date string is parsed once
+publish_time_parser = dates.PublishTimeParser()
+# Stage timings for this process; main() swaps in one with cProfile for --profile
+profiler = profiling.Profiler()
+
+
+def parse_publish_time(values, formats=None):
+    """Parse publish_time, turning anything unparseable into NaT"""
+    # Values that aren't YYYY or YYYY-MM-DD are parsed one by one
+    # (format='mixed'), so the result never depends on chunk boundaries
+    return publish_time_parser.parse(values, formats)
+
+
+def clean_chunk(df, formats=None):
+    """Drop rows with no title or publish_time and add an integer year column
+
+    formats, if given, is a Counter of rows per publish_time format.
+    """
+    with profiler.stage('date_parsing'):
+        publish_time = parse_publish_time(df['publish_time'], formats)
+    with profiler.stage('cleaning'):
+        keep = df['title'].notna() & publish_time.notna()
+        df_clean = df[keep].copy()
+        df_clean['publish_time'] = publish_time[keep]
+        df_clean['year'] = df_clean['publish_time'].dt.year.astype(schema.YEAR_DTYPE)
+    return df_clean
+
+
+def _top(counter, n):
+    """n largest counts, ties broken by name so every run orders them the same"""
+    top = sorted(counter.items(), key=lambda item: (-item[1], str(item[0])))[:n]
+    return pd.Series(dict(top), dtype='int64')
+
+
+class MetadataStats:
+    """Running counts over metadata.csv, updated one chunk at a time
+
+    With sketch_error set, journal and source counts are kept in fixed-size
+    heavy-hitter sketches instead of exact Counters: memory no longer grows
+    with the number of distinct journals, and every count is at most
+    sketch_error * rows short.
+    """
+
+    def __init__(self, sketch_error=None):
+        self.rows = 0
+        self.columns = 0
+        self.clean_rows = 0
+        self.missing = pd.Series(dtype='int64')
+        self.year_counts = Counter()
+        self.sketch_error = sketch_error
+        if sketch_error:
+            self.journal_counts = sketches.HeavyHitters(sketch_error)
+            self.source_counts = sketches.HeavyHitters(sketch_error)
+            self.year_journal_counts = sketches.YearHeavyHitters(sketch_error)
+            self.year_source_counts = sketches.YearHeavyHitters(sketch_error)
+        else:
+            self.journal_counts = Counter()
+            self.source_counts = Counter()
+            self.year_journal_counts = Counter()
+            self.year_source_counts = Counter()
+        self.terms = terms.TermCounts()
+        self.date_formats = Counter()
+
+    def update(self, raw, clean):
+        """Fold one raw chunk and its cleaned rows into the running counts"""
+        self.rows += len(raw)
+        self.columns = raw.shape[1]
+        self.missing = self.missing.add(raw.isnull().sum(), fill_value=0).astype('int64')
+        self.clean_rows += len(clean)
+        self.year_counts.update(clean['year'].value_counts().to_dict())
+        source = source_column(clean)
+        if self.sketch_error:
+            self.year_journal_counts.update(clean['year'], clean['journal'])
+            self.journal_counts.update(clean['journal'])
+            self.year_source_counts.update(clean['year'], clean[source])
+            self.source_counts.update(clean[source])
+        else:
+            year_journal = clean.groupby(['year', 'journal'], observed=True).size()
+            self.year_journal_counts.update(year_journal.to_dict())
+            self.journal_counts.update(year_journal.groupby(level='journal', observed=True).sum().to_dict())
+            year_source = clean.groupby(['year', source], observed=True).size()
+            self.year_source_counts.update(year_source.to_dict())
+            self.source_counts.update(year_source.groupby(level=1, observed=True).sum().to_dict())
+        # Count title words per chunk so we never build one giant string
+        self.terms.update(clean)
+
+    def merge(self, other):
+        """Add the counts from another MetadataStats (e.g. a partition)"""
+        self.rows += other.rows
+        self.columns = other.columns or self.columns
+        self.clean_rows += other.clean_rows
+        self.missing = self.missing.add(other.missing, fill_value=0).astype('int64')
+        self.year_counts.update(other.year_counts)
+        if self.sketch_error:
+            self.journal_counts.merge(other.journal_counts)
+            self.source_counts.merge(other.source_counts)
+            self.year_journal_counts.merge(other.year_journal_counts)
+            self.year_source_counts.merge(other.year_source_counts)
+        else:
+            self.journal_counts.update(other.journal_counts)
+            self.source_counts.update(other.source_counts)
+            self.year_journal_counts.update(other.year_journal_counts)
+            self.year_source_counts.update(other.year_source_counts)
+        self.terms.merge(other.terms)
+        self.date_formats.update(other.date_formats)
+
+    def to_state(self):
+        """Plain-JSON copy of the running counts"""
+        state = {
+            'rows': self.rows,
+            'columns': self.columns,
+            'clean_rows': self.clean_rows,
+            'missing': {col: int(n) for col, n in self.missing.items()},
+            'year_counts': [[int(y), n] for y, n in self.year_counts.items()],
+            'sketch_error': self.sketch_error,
+            'terms': self.terms.to_state(),
+            'date_formats': dict(self.date_formats),
+        }
+        if self.sketch_error:
+            for name in ('journal_counts', 'source_counts', 'year_journal_counts', 'year_source_counts'):
+                state[name] = getattr(self, name).to_state()
+        else:
+            state.update({
+                'journal_counts': list(self.journal_counts.items()),
+                'source_counts': list(self.source_counts.items()),
+                'year_journal_counts': [[int(y), j, n] for (y, j), n in self.year_journal_counts.items()],
+                'year_source_counts': [[int(y), src, n] for (y, src), n in self.year_source_counts.items()],
+            })
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls(state.get('sketch_error'))
+        stats.rows = state['rows']
+        stats.columns = state['columns']
+        stats.clean_rows = state['clean_rows']
+        stats.missing = pd.Series(state['missing'], dtype='int64')
+        stats.year_counts = Counter(dict((y, n) for y, n in state['year_counts']))
+        if stats.sketch_error:
+            stats.journal_counts = sketches.HeavyHitters.from_state(state['journal_counts'])
+            stats.source_counts = sketches.HeavyHitters.from_state(state['source_counts'])
+            stats.year_journal_counts = sketches.YearHeavyHitters.from_state(state['year_journal_counts'])
+            stats.year_source_counts = sketches.YearHeavyHitters.from_state(state['year_source_counts'])
+        else:
+            stats.journal_counts = Counter(dict((j, n) for j, n in state['journal_counts']))
+            stats.source_counts = Counter(dict((src, n) for src, n in state['source_counts']))
+            stats.year_journal_counts = Counter({(y, j): n for y, j, n in state['year_journal_counts']})
+            stats.year_source_counts = Counter({(y, src): n for y, src, n in state['year_source_counts']})
+        stats.terms = terms.TermCounts.from_state(state['terms'])
+        stats.date_formats = Counter(state.get('date_formats', {}))
+        return stats
+
+    def counts_frame(self):
+        """Counts per (year, journal) and (year, source) for the dashboard"""
+        if self.sketch_error:
+            # Only the values each year's sketch kept, as lower bounds
+            counts = cube.counts_frame(self.year_counts, journal=self.year_journal_counts.pair_counts(),
+                                       source=self.year_source_counts.pair_counts())
+            # ...saved with how far each one can be short: the bound of its year's sketch
+            errors = {'journal': self.year_journal_counts.year_errors(),
+                      'source': self.year_source_counts.year_errors()}
+            counts['error'] = [errors[dimension].get(int(year), 0) if dimension in errors else 0
+                               for dimension, year in zip(counts['dimension'], counts['year'])]
+            return counts
+        return cube.counts_frame(self.year_counts, journal=self.year_journal_counts,
+                                 source=self.year_source_counts)
+
+    def year_series(self):
+        return pd.Series(self.year_counts, dtype='int64').sort_index()
+
+    def top_journals(self, n=10):
+        if self.sketch_error:
+            return self.journal_counts.top(n)
+        return _top(self.journal_counts, n)
+
+    def top_sources(self, n=5):
+        if self.sketch_error:
+            return self.source_counts.top(n)
+        return _top(self.source_counts, n)
+
+    def count_errors(self):
+        """Guaranteed error of the journal and source counts (0 when they are exact)"""
+        if self.sketch_error:
+            return self.journal_counts.error_bound, self.source_counts.error_bound
+        return 0, 0
+
+
+def explore(df, label="Dataset"):
+    """Print the basic structure of a loaded frame or chunk"""
+    print(f"{label} Shape:", df.shape)
+    print("\nData Types:")
+    print(df.dtypes)
+    print("\nBasic Stats:")
+    print(df.describe(include='all'))
+    print("\nFirst 5 rows:")
+    print(df.head())
+
+
+def run_eager(args, stats, writer):
+    """Load up to --limit rows into memory and analyze them in one go"""
+    with profiler.stage('load'):
+        df = read_metadata(args.input, limit=args.limit)
+    # The estimate came from the start of the file; check what was actually loaded too
+    schema.check_budget(schema.memory_report(df), args.memory_budget, "The loaded rows")
+    explore(df)
+
+    print("\n=== Basic Cleaning ===")
+    df_clean = clean_chunk(df, stats.date_formats)
+    print("Year column added. Sample years:", df_clean['year'].unique())
+    with profiler.stage('aggregation'):
+        stats.update(df, df_clean)
+
+    # Save cleaned data for Streamlit
+    with profiler.stage(f'{writer.fmt}_write'):
+        writer.write(df_clean)
+
+
+def process_chunks(chunks, stats, writer, verbose=True):
+    """Clean each chunk, fold it into stats and append it to the cleaned store"""
+    first = True
+    for chunk in profiler.iterate('load', chunks):
+        if first and verbose:
+            explore(chunk, label="First Chunk")
+            print("\n=== Basic Cleaning (streaming) ===")
+        clean = clean_chunk(chunk, stats.date_formats)
+        with profiler.stage('aggregation'):
+            stats.update(chunk, clean)
+        # Append cleaned rows for Streamlit as we go
+        with profiler.stage(f'{writer.fmt}_write'):
+            writer.write(clean)
+        first = False
+        if verbose:
+            print(f"Processed {stats.rows} rows ({stats.clean_rows} kept)")
+
+
+def run_stream(args, stats, writer):
+    """Read metadata.csv chunk by chunk so memory stays flat as the file grows"""
+    process_chunks(read_metadata(args.input, limit=args.limit, chunksize=args.chunksize), stats, writer)
+
+
+def stratum_values(chunk, stratify):
+    """The --stratify column of a chunk: publish year or source"""
+    if stratify == 'year':
+        return parse_publish_time(chunk['publish_time']).dt.year.astype('Int64')
+    return chunk[source_column(chunk)]
+
+
+def run_sample(args, stats, writer):
+    """Read the whole file once, keep a uniform random sample of --sample rows and analyze that
+
+    With --stratify a first, cheaper pass reads only the stratify column to
+    count the rows per stratum, so each stratum's reservoir can be sized to
+    its final share and no more than --sample rows are ever held.
+    """
+    strata_counts = None
+    if args.stratify:
+        columns = ['publish_time'] if args.stratify == 'year' else ['source_x', 'source']
+        options = dict(schema.read_options(), usecols=lambda c: c in columns)
+        with profiler.stage('sampling'):
+            chunks = pd.read_csv(args.input, chunksize=args.chunksize, **options)
+            strata_counts = sampling.count_strata(stratum_values(chunk, args.stratify) for chunk in chunks)
+        print(f"Counted {len(strata_counts)} strata")
+    reservoir = sampling.Reservoir(args.sample, seed=args.seed, strata=strata_counts)
+    for chunk in profiler.iterate('load', read_metadata(args.input, chunksize=args.chunksize)):
+        strata = stratum_values(chunk, args.stratify) if args.stratify else None
+        with profiler.stage('sampling'):
+            reservoir.update(chunk, strata)
+        print(f"Sampled from {reservoir.seen} rows")
+    df = reservoir.result()
+    schema.check_budget(schema.memory_report(df), args.memory_budget, "The sample")
+    explore(df, label="Sample")
+
+    print("\n=== Basic Cleaning ===")
+    df_clean = clean_chunk(df, stats.date_formats)
+    with profiler.stage('aggregation'):
+        stats.update(df, df_clean)
+    with profiler.stage(f'{writer.fmt}_write'):
+        writer.write(df_clean)
+
+
+def _process_partition(job):
+    """Worker: clean one byte range of metadata.csv into its own part file"""
+    global profiler
+    path, start, end, header, chunksize, part_path, fmt, sketch_error, cprofile = job
+    # A fresh profiler per partition; its stage times (and cProfile data) are added to the parent's
+    profiler = profiling.Profiler(cprofile)
+    stats = MetadataStats(sketch_error)
+    with store.CleanedWriter(part_path, fmt) as writer:
+        process_chunks(read_range(path, start, end, header, chunksize), stats, writer, verbose=False)
+    profiler.stop()
+    return stats, writer.rows, profiler
+
+
+def run_parallel(args, stats, writer, start=None, end=None):
+    """Clean byte-range partitions in a process pool, then merge them in file order
+
+    The merged counts and cleaned rows are identical to a serial run: each
+    partition is a contiguous run of records and the parts are appended in
+    order.
+    """
+    header = read_header(args.input)
+    byte_ranges = partitions.ranges(args.input, start, end, parts=args.workers)
+    part_paths = [f'{writer.path}.part-{i:04d}' for i in range(len(byte_ranges))]
+    jobs = [(args.input, lo, hi, header, args.chunksize, part_path, writer.fmt, stats.sketch_error,
+             profiler.cprofile)
+            for (lo, hi), part_path in zip(byte_ranges, part_paths)]
+    print(f"Processing {len(jobs)} partitions with {args.workers} workers")
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for (part_stats, rows, part_profiler), part_path in zip(pool.map(_process_partition, jobs),
+                                                                     part_paths):
+                with profiler.stage('merge'):
+                    stats.merge(part_stats)
+                    writer.append_part(part_path, rows)
+                profiler.merge(part_profiler)
+                print(f"Processed {stats.rows} rows ({stats.clean_rows} kept)")
+    finally:
+        for part_path in part_paths:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+    return header
+
+
+def run_incremental(args):
+    """Parse only the rows appended since the last run; returns None when nothing changed"""
+    output = args.output or store.default_path(args.format)
+    end = os.path.getsize(args.input)
+    state = incremental.load_state(args.state)
+    reason = incremental.rebuild_reason(state, args.input, output, args.format)
+    if reason is None and state['stats'].get('sketch_error') != args.sketch_error:
+        reason = "different --sketch-error"
+    if reason is None and state.get('dedup') != args.dedup:
+        reason = "different --dedup"   # Old files would keep (or lack) the cluster_id column
+
+    if reason is None:
+        if state['offset'] == end:
+            print("No new rows since the last run; outputs are up to date.")
+            return None
+        for path in incremental.discard_uncommitted(state, output):
+            print(f"Removed '{path}', left by an interrupted run")
+        print(f"Appending rows from byte {state['offset']} to {end}")
+        stats = MetadataStats.from_state(state['stats'])
+        header = state['header']
+        start = state['offset']
+    else:
+        print(f"Full rebuild ({reason})")
+        stats = MetadataStats(args.sketch_error)
+        header = read_header(args.input)
+        start = partitions.header_end(args.input)
+
+    with store.CleanedWriter(output, args.format, append=reason is None) as writer:
+        if args.workers > 1:
+            run_parallel(args, stats, writer, start, end)
+        else:
+            process_chunks(read_range(args.input, start, end, header, args.chunksize), stats, writer)
+    state = incremental.new_state(args.input, end, header, output, args.format, stats.to_state(),
+                                  previous=state if reason is None else None)
+    state['dedup'] = args.dedup
+    incremental.save_state(state, args.state)
+    return stats, writer
+
+
+def check_memory_budget(args):
+    """Estimate the memory of the rows held at once from the start of the file; raises before loading them"""
+    sample, file_rows = schema.estimate(args.input)
+    if args.workers > 1:
+        rows = args.workers * args.chunksize
+    elif args.sample:
+        # The reservoir (stratified or not, never more than --sample rows) plus the chunk being sampled;
+        # --limit doesn't apply, the whole file is read
+        rows = min(args.sample + args.chunksize, file_rows)
+    elif args.stream or args.incremental:
+        rows = min(args.chunksize, file_rows, args.limit or file_rows)
+    else:
+        rows = min(file_rows, args.limit or file_rows)
+    report = schema.memory_report(sample, rows)
+    total = schema.check_budget(report, args.memory_budget, f"Holding {rows:,} rows at once")
+    print(f"Estimated memory for {rows:,} rows: {total:.0f} MB (budget {args.memory_budget:.0f} MB)")
+
+
+def run(args):
+    """Load, clean and count metadata.csv as the flags ask; returns (stats, writer), or None if nothing changed"""
+    if args.memory_budget is not None:
+        check_memory_budget(args)
+    if args.incremental:
+        return run_incremental(args)
+    stats = MetadataStats(args.sketch_error)
+    with store.CleanedWriter(args.output, args.format) as writer:
+        if args.workers > 1:
+            run_parallel(args, stats, writer)
+        elif args.sample:
+            run_sample(args, stats, writer)
+        elif args.stream:
+            run_stream(args, stats, writer)
+        else:
+            run_eager(args, stats, writer)
+    return stats, writer
+
+
+def _with_error(counts, error):
+    return pd.DataFrame({'count': counts, 'error': error}, index=counts.index)
+
+
+def report(stats, header):
+    """Print missing values and the key patterns from the running counts; header is every column of metadata.csv"""
+    print("\nDataset Shape:", (stats.rows, len(header)))
+
+    # Check missing values (as requested); only the schema's columns are parsed, so only they are counted
+    print(f"\nMissing Values per Column (the {stats.columns} of {len(header)} columns analysis.py reads):")
+    print(stats.missing[stats.missing > 0].sort_values(ascending=False, kind='stable'))
+
+    print("\nRows per publish_time format:")
+    print(pd.Series(stats.date_formats, dtype='int64').sort_values(ascending=False, kind='stable'))
+
+    print(f"\nCleaned Data Shape: ({stats.clean_rows}, {stats.columns + 1})")
+    year_counts = stats.year_series()
+    print("Year Range:", year_counts.index.min(), "to", year_counts.index.max())
+
+    # Explore key patterns
+    print("\n=== Key Patterns ===")
+    print("Publications by Year:\n", year_counts)
+    journal_error, source_error = stats.count_errors()
+    if stats.sketch_error:
+        # Sketched counts are lower bounds; the true count is at most `error` higher
+        print(f"\nTop 10 Journals (approximate, counts may be up to {journal_error} low):")
+        print(_with_error(stats.top_journals(10), journal_error))
+        print(f"\nTop 5 Sources (approximate, counts may be up to {source_error} low):")
+        print(_with_error(stats.top_sources(5), source_error))
+        # The per-year counts the dashboard sums are saved with each year's bound in an 'error' column
+        print(f"\nPer-year counts summed over all years may be up to {stats.year_journal_counts.error_bound()} "
+              f"(journals) and {stats.year_source_counts.error_bound()} (sources) low.")
+    else:
+        print("\nTop 10 Journals:\n", stats.top_journals(10))
+        print("\nTop 5 Sources:\n", stats.top_sources(5))
+    # Title terms are always sketched per year; the term table saves each year's bound in an 'error' column
+    print(f"\nTitle term counts (word clouds) summed over all years may be up to {stats.terms.error_bound()} low.")
+
+
+def report_duplicates(cluster_ids, folder='.'):
+    rows = len(cluster_ids)
+    clusters = int((cluster_ids == np.arange(rows)).sum())
+    print(f"\n{rows - clusters} of {rows} rows are near-duplicates of an earlier title; "
+          f"{clusters} distinct publications")
+    counts = cube.load(folder, deduplicated=True)
+    years = counts.loc[counts['dimension'] == 'year'].set_index('year')['count']
+    print("\nDistinct publications by year:")
+    print(years.to_string())
+
+
+def plot_all(stats, workers=len(figures.FIGURES), force=False):
+    print("\n=== Generating Visualizations ===")
+    # Viz 1: Publications by Year, Viz 2: Top Journals, Viz 3: Word Cloud for Titles,
+    # drawn headless in parallel; a PNG whose counts haven't changed is kept as it is
+    inputs = {
+        'year': stats.year_series(),
+        'journals': stats.top_journals(10),
+        'wordcloud': stats.terms.totals(),
+    }
+    status = figures.export(inputs, workers=workers, force=force, profiler=profiler)
+    for name, state in status.items():
+        path = figures.FIGURES[name][0]
+        print(f"Saved: {path}" if state == 'rendered' else f"Unchanged: {path} (same counts as last run)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Explore, clean and plot CORD-19 metadata.csv")
+    parser.add_argument('--input', default=DATA_FILE, help="path to metadata.csv")
+    parser.add_argument('--output', help="where to write the cleaned rows "
+                        f"(default: {store.PARQUET_FILE}, or {store.CSV_FILE} with --format csv)")
+    parser.add_argument('--format', choices=['parquet', 'csv'], default=store.default_format(),
+                        help="cleaned data format (parquet needs pyarrow)")
+    parser.add_argument('--stream', action='store_true',
+                        help="read the file in chunks instead of loading it into memory")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help="rows per chunk in --stream mode")
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT,
+                        help="stop after this many rows (0 reads the whole file)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only parse rows appended since the last --incremental run "
+                             "(always covers the whole file)")
+    parser.add_argument('--state', default=incremental.STATE_FILE,
+                        help="state file used by --incremental")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="clean partitions of the file in this many processes "
+                             "(always covers the whole file)")
+    parser.add_argument('--sample', type=int,
+                        help="analyze a uniform random sample of this many rows from the whole file "
+                             "instead of the first --limit rows")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for --sample")
+    parser.add_argument('--stratify', choices=['source_x', 'year'],
+                        help="with --sample, sample each source_x (or publish year) in proportion to its rows "
+                             "(reads the file twice: once to count the rows per stratum)")
+    parser.add_argument('--sketch-error', type=float, nargs='?', const=sketches.DEFAULT_ERROR,
+                        help="count journals and sources with fixed-memory heavy-hitter sketches; "
+                             f"counts are at most this fraction of the rows low (default {sketches.DEFAULT_ERROR})")
+    parser.add_argument('--memory-budget', type=float, metavar='MB',
+                        help="stop before loading if the rows held in memory at once would need more than "
+                             "this many MB (prints the estimate per column)")
+    parser.add_argument('--profile', action='store_true',
+                        help="also run cProfile and save a dump of the slowest stage next to the outputs")
+    parser.add_argument('--figure-workers', type=int, default=len(figures.FIGURES),
+                        help="processes drawing the PNGs (1 draws them in this process)")
+    parser.add_argument('--redraw', action='store_true',
+                        help="draw every PNG even if its counts haven't changed since the last run")
+    parser.add_argument('--dedup', type=float, nargs='?', const=dedup.DEFAULT_THRESHOLD, metavar='THRESHOLD',
+                        help="cluster near-duplicate titles (MinHash/LSH) into a cluster_id column and save counts "
+                             "with each cluster counted once; titles match at this estimated similarity "
+                             f"(default {dedup.DEFAULT_THRESHOLD})")
+    parser.add_argument('--no-search-index', dest='search_index', action='store_false',
+                        help="skip building the dashboard's title/abstract search index")
+    args = parser.parse_args(argv)
+    if args.sketch_error is not None and not 0 < args.sketch_error < 1:
+        parser.error("--sketch-error must be between 0 and 1")
+    if args.dedup is not None and not 0 < args.dedup <= 1:
+        parser.error("--dedup must be above 0 and at most 1")
+    args.limit = args.limit or None
+    if args.sample is not None and (args.sample < 1 or args.incremental or args.workers > 1):
+        parser.error("--sample needs a positive size and can't be combined with --incremental or --workers")
+    if args.stratify and args.sample is None:
+        parser.error("--stratify only applies to --sample")
+    if args.incremental or args.workers > 1:
+        args.limit = None
+    return args
+
+
+def refresh_outputs(args, writer):
+    """Near-duplicate clusters, search index and dashboard snapshot, each rebuilt over all cleaned rows
+
+    These cost time in proportion to the whole cleaned data, so an
+    --incremental run whose appended rows were all dropped keeps them.
+    """
+    folder = os.path.dirname(writer.path)
+    if writer.append and writer.rows == 0:
+        print("No new cleaned rows; near-duplicate clusters, search index and snapshot are up to date.")
+        return
+    # Preprints and their published versions (and other near-identical titles) counted once
+    if args.dedup is not None:
+        print("Finding near-duplicate titles...")
+        with profiler.stage('dedup'):
+            cluster_ids = dedup.run(folder, args.dedup, args.format)
+        report_duplicates(cluster_ids, folder)
+    else:
+        dedup.clear(folder)
+    # Inverted index over titles and abstracts for the dashboard's search box
+    index_build = None
+    if args.search_index:
+        print("Building search index...")
+        with profiler.stage('search_index'):
+            index_build = search_index.build(folder)
+    # Memory-mapped copy for the dashboard; running dashboards switch to it on their next rerun
+    with profiler.stage('snapshot'):
+        snapshot.publish(folder, search_index=index_build)
+
+
+def main(argv=None):
+    global profiler
+    args = parse_args(argv)
+    profiler = profiling.Profiler(cprofile=args.profile)
+
+    # Ensure plots save in current directory
+    os.makedirs('plots', exist_ok=True)  # Optional: Create a plots folder
+
+    print("=== Loading and Exploring CORD-19 Metadata ===")
+    try:
+        result = run(args)
+    except schema.MemoryBudgetError as e:
+        print(f"\nError: {e}.\nEstimated memory per column:\n{e.report}", file=sys.stderr)
+        sys.exit(1)
+    if result is None:
+        return
+    stats, writer = result
+
+    if stats.clean_rows == 0:
+        print("No rows with both a title and a publish_time; nothing to plot.")
+        return
+
+    # Pre-aggregated counts so the dashboard never rescans the rows
+    folder = os.path.dirname(writer.path)
+    with profiler.stage('aggregates_write'):
+        cube.save(stats.counts_frame(), args.format, folder)
+        # Per-year title term counts for the dashboard's word cloud
+        terms.save(stats.terms, args.format, folder)
+    refresh_outputs(args, writer)
+
+    report(stats, read_header(args.input))
+    plot_all(stats, args.figure_workers, args.redraw)
+
+    # Where the time went, for this run and for comparing runs over time
+    profiler.stop()
+    profiler.print_report()
+    profile_path = profiler.save(folder, {'argv': sys.argv[1:] if argv is None else list(argv),
+                                          'rows': stats.rows, 'clean_rows': stats.clean_rows})
+    print(f"Stage timings saved as '{profile_path}'")
+
+    print("\n=== Done! ===")
+    print(f"Cleaned data saved as '{writer.path}'")
+    print("Plots saved as PNG files.")
+    print("Run 'streamlit run streamlit_app.py' next for the app.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# benchmark.py: Time each stage of the CORD-19 pipeline on synthetic metadata files
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from profiling import peak_rss_mb
+import synthetic_metadata
+
+RESULTS_FILE = 'benchmark_results.json'
+STAGES = ['load', 'date_parsing', 'cleaning', 'aggregation', 'word_cloud',
+          'csv_write', 'columnar_write', 'snapshot_publish', 'dashboard_load']
+REGRESSION_THRESHOLD = 1.10  # Flag stages more than 10% slower than the baseline
+MIN_SECONDS = 0.05           # ...unless they are too short to time reliably
+
+
+class StageTimer:
+    """Accumulate wall time per stage across many chunks"""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+
+    def time(self, stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.seconds[stage] += time.perf_counter() - start
+        return result
+
+
+def open_dashboard(folder):
+    """What a dashboard process does before its first page: open the snapshot and read its aggregates"""
+    import snapshot  # Imported here, like run_one's imports, so the parent process stays small
+
+    snap = snapshot.Snapshot(folder)
+    snap.table('aggregates')
+    return snap
+
+
+def run_one(path, chunksize):
+    """Run every stage on one file in this process and return the measurements"""
+    # Imported here so the parent process stays small
+    import matplotlib
+    matplotlib.use('Agg')
+    from wordcloud import WordCloud
+
+    import analysis
+    import snapshot
+    import store
+
+    timer = StageTimer()
+    stats = analysis.MetadataStats()
+    with tempfile.TemporaryDirectory() as out_dir:
+        csv_path = os.path.join(out_dir, store.CSV_FILE)
+        parquet_path = os.path.join(out_dir, store.PARQUET_FILE)
+        csv_writer = store.CleanedWriter(csv_path, 'csv')
+        parquet_writer = store.CleanedWriter(parquet_path, 'parquet') if store.pq is not None else None
+
+        chunks = iter(analysis.read_metadata(path, chunksize=chunksize))
+        while True:
+            chunk = timer.time('load', next, chunks, None)
+            if chunk is None:
+                break
+            # Warms the parser's cache, so 'cleaning' below only pays for lookups
+            timer.time('date_parsing', analysis.parse_publish_time, chunk['publish_time'])
+            clean = timer.time('cleaning', analysis.clean_chunk, chunk, stats.date_formats)
+            timer.time('aggregation', stats.update, chunk, clean)
+            timer.time('csv_write', csv_writer.write, clean)
+            if parquet_writer is not None:
+                timer.time('columnar_write', parquet_writer.write, clean)
+
+        timer.time('csv_write', csv_writer.close)
+        wordcloud = WordCloud(width=800, height=400, background_color='white')
+        timer.time('word_cloud', wordcloud.generate_from_frequencies, stats.terms.totals())
+        if parquet_writer is not None:
+            timer.time('columnar_write', parquet_writer.close)
+        # The dashboard reads the published snapshot, never the cleaned files themselves
+        timer.time('snapshot_publish', snapshot.publish, out_dir)
+        timer.time('dashboard_load', open_dashboard, out_dir)
+
+    return {
+        'rows': stats.rows,
+        'clean_rows': stats.clean_rows,
+        'stages': {stage: round(timer.seconds[stage], 4) for stage in STAGES if stage in timer.seconds},
+        'total_seconds': round(sum(timer.seconds.values()), 4),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold=REGRESSION_THRESHOLD):
+    """Print per-stage ratios against an older results file; returns the regressions"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    print(f"\n=== Compared with {baseline_path} (commit {baseline.get('commit')}) ===")
+    for size, result in results['sizes'].items():
+        old = baseline['sizes'].get(size)
+        if old is None:
+            continue
+        for stage, seconds in result['stages'].items():
+            old_seconds = old['stages'].get(stage)
+            if not old_seconds:
+                continue
+            ratio = seconds / old_seconds
+            slower = ratio > threshold and old_seconds >= MIN_SECONDS
+            flag = "  <-- slower" if slower else ""
+            print(f"{size:>5} {stage:<24} {old_seconds:9.3f}s -> {seconds:9.3f}s  x{ratio:.2f}{flag}")
+            if slower:
+                regressions.append((size, stage, ratio))
+        if old.get('peak_rss_mb') and result.get('peak_rss_mb'):
+            print(f"{size:>5} {'peak RSS':<24} {old['peak_rss_mb']:8.1f}MB -> {result['peak_rss_mb']:8.1f}MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CORD-19 pipeline on synthetic data")
+    parser.add_argument('--sizes', nargs='+', default=['10k', '100k'],
+                        help="file sizes to run (10k, 100k, 1M, 10M)")
+    parser.add_argument('--data-dir', default='synthetic', help="where synthetic files are kept")
+    parser.add_argument('--chunksize', type=int, default=50000)
+    parser.add_argument('--output', default=RESULTS_FILE, help="results JSON file")
+    parser.add_argument('--compare', help="older results JSON to compare against")
+    parser.add_argument('--run-one', help=argparse.SUPPRESS)  # Internal: one file per subprocess
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        print(json.dumps(run_one(args.run_one, args.chunksize)))
+        return
+
+    results = {
+        'commit': git_commit(),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'chunksize': args.chunksize,
+        'sizes': {},
+    }
+    os.makedirs(args.data_dir, exist_ok=True)
+    for size in args.sizes:
+        rows = synthetic_metadata.parse_size(size)
+        label = synthetic_metadata.size_label(rows)
+        path = os.path.join(args.data_dir, f'metadata_{label}.csv')
+        if not os.path.exists(path):
+            print(f"Generating {path}...")
+            synthetic_metadata.write_metadata(path, rows)
+        print(f"Benchmarking {label} rows...")
+        # A fresh process per size so peak RSS belongs to that size alone
+        out = subprocess.run([sys.executable, __file__, '--run-one', path, '--chunksize', str(args.chunksize)],
+                             capture_output=True, text=True, check=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        results['sizes'][label] = result
+        for stage, seconds in result['stages'].items():
+            print(f"  {stage:<24} {seconds:9.3f}s")
+        print(f"  {'peak RSS':<24} {result['peak_rss_mb']} MB")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than the baseline.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# charts.py: Rendered dashboard charts, cached as PNG bytes per (chart, min_year, max_year)
+import io
+import threading
+from collections import OrderedDict
+
+from matplotlib.figure import Figure
+import seaborn as sns
+from wordcloud import WordCloud
+
+MAX_BYTES = 64 * 1024 * 1024   # Total size of cached PNGs
+DPI = 100
+
+
+def _png(fig):
+    """Render a figure to PNG bytes and free it"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=DPI, bbox_inches='tight')
+    # Figures made with Figure() are never registered with pyplot, so
+    # clearing them here is all it takes for their memory to be released
+    fig.clear()
+    return buffer.getvalue()
+
+
+def render_year_chart(journal_cube, min_year, max_year):
+    year_counts = journal_cube.year_counts(min_year, max_year)
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    ax.bar(year_counts.index, year_counts.values, color='skyblue')
+    ax.set_title('Publications by Year (Filtered)')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Count')
+    return _png(fig)
+
+
+def render_journal_chart(journal_cube, min_year, max_year):
+    top_journals = journal_cube.top(min_year, max_year, 10)
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    if len(top_journals):
+        sns.barplot(x=top_journals.values, y=top_journals.index, ax=ax, palette='viridis')
+    ax.set_title('Top 10 Journals by Publication Count (Filtered)')
+    ax.set_xlabel('Count')
+    return _png(fig)
+
+
+def render_wordcloud(frequencies):
+    if not frequencies:
+        return None
+    wordcloud = WordCloud(width=800, height=400, background_color='white')
+    buffer = io.BytesIO()
+    wordcloud.generate_from_frequencies(frequencies).to_image().save(buffer, format='png')
+    return buffer.getvalue()
+
+
+class ChartCache:
+    """LRU of rendered charts, bounded by total PNG size
+
+    renderers maps a chart name to a function (min_year, max_year) -> PNG
+    bytes (or None). One cache is shared by every session in the server
+    process, so a slider position anyone has already visited is a lookup.
+    """
+
+    def __init__(self, renderers, max_bytes=MAX_BYTES):
+        self.renderers = renderers
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.images = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, chart, min_year, max_year):
+        key = (chart, min_year, max_year)
+        with self.lock:
+            if key in self.images:
+                self.images.move_to_end(key)
+                return self.images[key]
+        # Render outside the lock so other charts aren't held up
+        image = self.renderers[chart](min_year, max_year)
+        with self.lock:
+            if key not in self.images:
+                self.images[key] = image
+                self.size += len(image or b'')
+                while self.size > self.max_bytes and len(self.images) > 1:
+                    _, evicted = self.images.popitem(last=False)
+                    self.size -= len(evicted or b'')
+        return image
+
+    def warm(self, ranges):
+        """Render every chart for the given (min_year, max_year) ranges"""
+        for min_year, max_year in ranges:
+            for chart in self.renderers:
+                self.get(chart, min_year, max_year)
+
+    def warm_in_background(self, ranges):
+        # Not a daemon: killing it mid-render at interpreter exit can abort the process
+        thread = threading.Thread(target=self.warm, args=(ranges,))
+        thread.start()
+        return thread
+
+
+def common_ranges(first_year, last_year, recent=5):
+    """The ranges most sessions ask for: everything, then the last few years"""
+    ranges = [(first_year, last_year)]
+    for start in range(max(first_year, last_year - recent + 1), last_year + 1):
+        ranges.append((start, last_year))
+        ranges.append((start, start))
+    return list(dict.fromkeys(ranges))
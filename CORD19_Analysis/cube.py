@@ -0,0 +1,131 @@
+# cube.py: Pre-aggregated publication counts per (year, journal) and (year, source)
+import numpy as np
+import pandas as pd
+
+import store
+
+DIMENSIONS = ['journal', 'source']
+
+
+def counts_frame(year_counts, **pair_counts):
+    """Long table of counts: one row per (dimension, year, value)
+
+    year_counts maps year -> count; each keyword (journal=..., source=...)
+    maps (year, value) -> count.
+    """
+    rows = [('year', year, '', count) for year, count in year_counts.items()]
+    for dimension, counts in pair_counts.items():
+        rows.extend((dimension, year, value, count) for (year, value), count in counts.items())
+    rows.sort(key=lambda row: (row[0], row[1], str(row[2])))
+    df = pd.DataFrame(rows, columns=['dimension', 'year', 'value', 'count'])
+    df['year'] = df['year'].astype('int16')
+    df['count'] = df['count'].astype('int64')
+    return df
+
+
+def counts_from_rows(df):
+    """Build the same table straight from cleaned rows (used when no aggregates were saved)"""
+    source = 'source_x' if 'source_x' in df.columns else 'source'
+    year_counts = df['year'].value_counts().to_dict()
+    journal = df.groupby(['year', 'journal'], observed=True).size().to_dict()
+    sources = df.groupby(['year', source], observed=True).size().to_dict()
+    return counts_frame(year_counts, journal=journal, source=sources)
+
+
+def counts_from_batches(batches):
+    """counts_from_rows() over cleaned rows that come in batches (e.g. from store.iter_cleaned)"""
+    frames = [counts_from_rows(batch) for batch in batches]
+    if not frames:
+        return counts_frame({})
+    counts = pd.concat(frames).groupby(['dimension', 'year', 'value'], sort=True)['count'].sum()
+    counts = counts.reset_index()
+    counts['year'] = counts['year'].astype('int16')
+    return counts
+
+
+def _base(deduplicated):
+    return store.DEDUP_AGGREGATES_BASE if deduplicated else store.AGGREGATES_BASE
+
+
+def save(counts, fmt=None, folder='.', deduplicated=False):
+    """Write the count table; deduplicated=True writes the one with near-duplicate titles counted once"""
+    return store.save_table(counts, _base(deduplicated), fmt, folder)
+
+
+def load(folder='.', deduplicated=False):
+    return store.load_table(_base(deduplicated), folder)
+
+
+class YearCube:
+    """Counts per (year, value) with running totals over years
+
+    Any year-range query is a difference of two rows of the cumulative
+    matrix, so its cost depends on the number of years and distinct values,
+    never on the number of papers.
+    """
+
+    def __init__(self, counts, dimension):
+        years = counts.loc[counts['dimension'] == 'year']
+        self.first_year = int(years['year'].min())
+        self.last_year = int(years['year'].max())
+        n_years = self.last_year - self.first_year + 1
+
+        self.year_totals = np.zeros(n_years, dtype='int64')
+        np.add.at(self.year_totals, years['year'].to_numpy() - self.first_year, years['count'].to_numpy())
+
+        pairs = counts.loc[counts['dimension'] == dimension]
+        codes, self.values = pd.factorize(pairs['value'])
+        table = np.zeros((n_years, len(self.values)), dtype='int64')
+        np.add.at(table, (pairs['year'].to_numpy() - self.first_year, codes), pairs['count'].to_numpy())
+        # cumulative[i] holds the totals for every year before first_year + i
+        self.cumulative = np.zeros((n_years + 1, len(self.values)), dtype='int64')
+        np.cumsum(table, axis=0, out=self.cumulative[1:])
+
+    def _rows(self, min_year, max_year):
+        lo = min(max(min_year - self.first_year, 0), len(self.year_totals))
+        hi = min(max(max_year - self.first_year + 1, lo), len(self.year_totals))
+        return lo, hi
+
+    def year_counts(self, min_year, max_year):
+        """Publications per year in the range (years with none are left out)"""
+        lo, hi = self._rows(min_year, max_year)
+        counts = pd.Series(self.year_totals[lo:hi], index=np.arange(lo, hi) + self.first_year)
+        return counts[counts > 0]
+
+    def total(self, min_year, max_year):
+        lo, hi = self._rows(min_year, max_year)
+        return int(self.year_totals[lo:hi].sum())
+
+    def top(self, min_year, max_year, n=10):
+        """The n most common values in the range, largest first"""
+        lo, hi = self._rows(min_year, max_year)
+        totals = self.cumulative[hi] - self.cumulative[lo]
+        n = min(n, int((totals > 0).sum()))
+        if n == 0:
+            return pd.Series(dtype='int64')
+        best = np.argpartition(-totals, n - 1)[:n]
+        best = best[np.argsort(-totals[best], kind='stable')]
+        return pd.Series(totals[best], index=self.values[best])
+
+
+class YearIndex:
+    """Row positions sorted by year, so a year range is a contiguous slice"""
+
+    def __init__(self, years):
+        self.order = np.argsort(np.asarray(years), kind='stable')
+        self.sorted_years = np.asarray(years)[self.order]
+
+    @classmethod
+    def from_arrays(cls, order, sorted_years):
+        """Wrap an order computed earlier (e.g. memory-mapped from a snapshot) instead of sorting"""
+        index = cls.__new__(cls)
+        index.order = order
+        index.sorted_years = sorted_years
+        return index
+
+    def rows(self, min_year, max_year, limit=None):
+        lo = np.searchsorted(self.sorted_years, min_year, side='left')
+        hi = np.searchsorted(self.sorted_years, max_year, side='right')
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return self.order[lo:hi]
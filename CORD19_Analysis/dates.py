@@ -0,0 +1,73 @@
+# dates.py: Memoized publish_time parser with a fast path per known format
+import numpy as np
+import pandas as pd
+
+# (bucket name, full-match pattern, strptime format) for the formats CORD-19 uses
+KNOWN_FORMATS = [
+    ('YYYY', r'\d{4}', '%Y'),
+    ('YYYY-MM-DD', r'\d{4}-\d{2}-\d{2}', '%Y-%m-%d'),
+]
+OTHER = 'other'        # Parsed value by value, like pd.to_datetime(format='mixed')
+INVALID = 'invalid'    # Present but unparseable (becomes NaT)
+MISSING = 'missing'    # Empty in the CSV
+MAX_CACHE = 200000     # Distinct strings remembered before the cache is reset
+
+
+def _to_ns(times):
+    """Parsed times (any unit pandas chose) as datetime64[ns]; values outside its 1677-2262 range become NaT"""
+    times = pd.Series(times)
+    in_range = (times >= pd.Timestamp.min) & (times <= pd.Timestamp.max)
+    return times.where(in_range).astype('datetime64[ns]')
+
+
+class PublishTimeParser:
+    """Parse publish_time strings, each distinct string only once
+
+    There are only a few thousand distinct publish_time values across
+    millions of rows, so each chunk is factorized, only strings not seen
+    before are parsed, and the result is spread back to the rows.
+    """
+
+    def __init__(self, max_cache=MAX_CACHE):
+        self.max_cache = max_cache
+        self.times = pd.Series(dtype='datetime64[ns]')
+        self.buckets = pd.Series(dtype=object)
+
+    def _parse_new(self, strings):
+        times = pd.Series(pd.NaT, index=strings, dtype='datetime64[ns]')
+        buckets = pd.Series(OTHER, index=strings, dtype=object)
+        for name, pattern, fmt in KNOWN_FORMATS:
+            match = (buckets == OTHER) & strings.str.fullmatch(pattern)
+            if match.any():
+                times[match] = _to_ns(pd.to_datetime(strings[match], format=fmt, errors='coerce')).to_numpy()
+                buckets[match] = name
+        rest = buckets == OTHER
+        if rest.any():
+            times[rest] = _to_ns(pd.to_datetime(strings[rest], format='mixed', errors='coerce')).to_numpy()
+        buckets[times.isna()] = INVALID
+        self.times = pd.concat([self.times, times])
+        self.buckets = pd.concat([self.buckets, buckets])
+
+    def parse(self, values, formats=None):
+        """Return values as datetimes (NaT when unparseable); formats counts rows per format bucket"""
+        codes, uniques = pd.factorize(values)
+        uniques = pd.Index(uniques, dtype=object)
+        known = uniques.isin(self.times.index)
+        if len(self.times) + (~known).sum() > self.max_cache:
+            self.times = self.times.iloc[:0]
+            self.buckets = self.buckets.iloc[:0]
+            known[:] = False
+        if not known.all():
+            self._parse_new(uniques[~known])
+        times = self.times.reindex(uniques)
+        parsed = np.append(times.to_numpy(dtype='datetime64[ns]'), np.datetime64('NaT', 'ns'))
+        result = pd.Series(parsed[codes], index=values.index, name=values.name)
+
+        if formats is not None:
+            buckets = self.buckets.reindex(uniques)
+            rows = pd.Series(np.bincount(codes[codes >= 0], minlength=len(uniques)), index=buckets.values)
+            formats.update(rows.groupby(level=0).sum().to_dict())
+            missing = int((codes < 0).sum())
+            if missing:
+                formats[MISSING] += missing
+        return result
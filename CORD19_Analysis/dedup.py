@@ -0,0 +1,180 @@
+# dedup.py: Near-duplicate titles (preprint vs published, punctuation variants) with MinHash and LSH
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import cube
+import store
+
+DEFAULT_THRESHOLD = 0.8   # Estimated Jaccard similarity of title shingles to call two rows duplicates
+NUM_PERM = 64             # MinHash functions per title
+SHINGLE = 4               # Bytes per shingle of the normalized title
+BATCH_ROWS = 20000        # Titles hashed at a time
+PERM_BLOCK = 8            # Hash functions applied at a time (bounds memory per batch)
+VERIFY_BLOCK = 1_000_000  # Candidate pairs compared at a time
+CLUSTER_COLUMN = 'cluster_id'
+SIGNATURES = 'signatures.u32'
+
+EMPTY = np.uint32(0xFFFFFFFF)   # Signature value of titles with no shingles
+# Multiply-shift hashing: h(x) = (a * x + b) mod 2^64 >> 32, with wrap-around uint64 arithmetic
+_rng = np.random.default_rng(20200316)
+_A = _rng.integers(1, 1 << 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64)
+_SHIFT = np.uint64(32)
+_BAND_MULTIPLIERS = _rng.integers(1, 1 << 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+
+
+def normalize(titles):
+    """Lower-case, with runs of punctuation and whitespace turned into one space"""
+    # Object dtype, so the regex runs in Python's re, whose \W knows non-ASCII letters
+    text = titles.astype(object).where(titles.notna(), '').astype(str).astype(object)
+    return text.str.lower().str.replace(r'[\W_]+', ' ', regex=True).str.strip()
+
+
+def signatures(titles):
+    """MinHash signatures (rows x NUM_PERM, uint32) of a Series of titles; rows with an empty title are all EMPTY
+
+    The shingles are the overlapping SHINGLE-byte windows of the UTF-8
+    normalized title, packed into one integer each, so a whole batch is
+    shingled and hashed with array operations.
+    """
+    text = normalize(titles).str.pad(SHINGLE, side='right')
+    empty = text.str.strip() == ''
+    buf = np.frombuffer(('\0'.join(text) + '\0').encode('utf-8'), dtype=np.uint8)
+    result = np.full((len(text), NUM_PERM), EMPTY, dtype=np.uint32)
+    if len(buf) < SHINGLE:
+        return result
+    windows = np.zeros(len(buf) - SHINGLE + 1, dtype=np.uint64)
+    for i in range(SHINGLE):
+        windows = (windows << np.uint64(8)) | buf[i:len(buf) - SHINGLE + 1 + i]
+    # A window belongs to the title it starts in, unless it runs into the separator
+    separators = np.concatenate([[0], np.cumsum(buf == 0)])
+    inside = separators[SHINGLE:] == separators[:-SHINGLE]
+    rows = separators[:-SHINGLE][inside]
+    shingles = windows[inside]
+    # Windows come in row order, so each row's shingles are one segment
+    rows_with_shingles, starts = np.unique(rows, return_index=True)
+    keep = ~empty.to_numpy()[rows_with_shingles]
+    for lo in range(0, NUM_PERM, PERM_BLOCK):
+        hashes = (_A[lo:lo + PERM_BLOCK, None] * shingles + _B[lo:lo + PERM_BLOCK, None]) >> _SHIFT
+        mins = np.minimum.reduceat(hashes, starts, axis=1)
+        result[rows_with_shingles[keep], lo:lo + PERM_BLOCK] = mins[:, keep].T
+    return result
+
+
+def lsh_bands(threshold, num_perm=NUM_PERM):
+    """(bands, rows per band) whose S-curve midpoint (1/bands)^(1/rows) is closest to threshold from below
+
+    Pairs are candidates if they agree on all rows of any band; erring low
+    keeps recall high, and every candidate is checked against the threshold.
+    """
+    options = [(num_perm // r, r) for r in range(1, num_perm + 1) if num_perm % r == 0]
+    below = [option for option in options if (1 / option[0]) ** (1 / option[1]) <= threshold]
+    return max(below or options[:1], key=lambda option: (1 / option[0]) ** (1 / option[1]))
+
+
+def candidate_pairs(sigs, valid, bands, rows_per_band):
+    """(row, representative) pairs that share an LSH bucket; the representative is the bucket's first row"""
+    ids = np.flatnonzero(valid)
+    pairs = []
+    for band in range(bands):
+        columns = slice(band * rows_per_band, (band + 1) * rows_per_band)
+        block = np.asarray(sigs[ids, columns], dtype=np.uint64)
+        keys = (block * _BAND_MULTIPLIERS[columns]).sum(axis=1)  # Wraps around, like a hash
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        first = np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]])
+        representative = order[np.flatnonzero(first)[np.cumsum(first) - 1]]
+        duplicate = order != representative
+        pairs.append(np.stack([ids[order[duplicate]], ids[representative[duplicate]]], axis=1))
+    pairs = np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=np.int64)
+    return np.unique(pairs, axis=0)
+
+
+def similar(sigs, pairs, threshold):
+    """Mask of the pairs whose estimated Jaccard similarity reaches threshold"""
+    keep = np.zeros(len(pairs), dtype=bool)
+    for lo in range(0, len(pairs), VERIFY_BLOCK):
+        block = pairs[lo:lo + VERIFY_BLOCK]
+        keep[lo:lo + VERIFY_BLOCK] = (sigs[block[:, 0]] == sigs[block[:, 1]]).mean(axis=1) >= threshold
+    return keep
+
+
+def components(n, pairs):
+    """For each of n rows, the smallest row connected to it through pairs (union-find on arrays)"""
+    labels = np.arange(n)
+    u, v = pairs[:, 0], pairs[:, 1]
+    while len(u):
+        lu, lv = labels[u], labels[v]
+        pending = lu != lv
+        if not pending.any():
+            break
+        u, v, lu, lv = u[pending], v[pending], lu[pending], lv[pending]
+        # Hang the larger root under the smaller one, then point every row straight at its root
+        np.minimum.at(labels, np.maximum(lu, lv), np.minimum(lu, lv))
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+    return labels
+
+
+def find_clusters(title_batches, threshold=DEFAULT_THRESHOLD, work_dir=None):
+    """Cluster ID (smallest row number in the cluster) for every row of the title batches, in order
+
+    Signatures go to a memory-mapped file. What stays in memory still grows
+    with the number of rows: the keys and sort order of one LSH band for
+    every title at a time, and the candidate pairs of all bands.
+    """
+    tmp_dir = tempfile.mkdtemp(dir=work_dir)
+    try:
+        path = os.path.join(tmp_dir, SIGNATURES)
+        n = 0
+        valid = []
+        with open(path, 'wb') as f:
+            for titles in title_batches:
+                sigs = signatures(titles)
+                sigs.tofile(f)
+                valid.append(sigs[:, 0] != EMPTY)
+                n += len(sigs)
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+        sigs = np.memmap(path, dtype=np.uint32, mode='r', shape=(n, NUM_PERM))
+        bands, rows_per_band = lsh_bands(threshold)
+        pairs = candidate_pairs(sigs, np.concatenate(valid), bands, rows_per_band)
+        pairs = pairs[similar(sigs, pairs, threshold)]
+        del sigs
+        return components(n, pairs)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def deduplicated_counts(cluster_ids, folder='.'):
+    """The cube's count table over one row per cluster (its first row)"""
+    def representatives():
+        start = 0
+        for batch in store.iter_cleaned(['year', 'journal', 'source_x', 'source'], BATCH_ROWS, folder):
+            rows = np.arange(start, start + len(batch))
+            yield batch[cluster_ids[start:start + len(batch)] == rows]
+            start += len(batch)
+    return cube.counts_from_batches(representatives())
+
+
+def run(folder='.', threshold=DEFAULT_THRESHOLD, fmt=None):
+    """Cluster the cleaned titles, write the cluster_id column and the deduplicated counts; returns the IDs"""
+    titles = (batch['title'] for batch in store.iter_cleaned(['title'], BATCH_ROWS, folder))
+    cluster_ids = find_clusters(titles, threshold, work_dir=folder or '.')
+    store.add_column(CLUSTER_COLUMN, cluster_ids, folder)
+    cube.save(deduplicated_counts(cluster_ids, folder), fmt, folder, deduplicated=True)
+    return cluster_ids
+
+
+def clear(folder='.'):
+    """Remove deduplicated counts left by an earlier --dedup run, so the dashboard doesn't show stale ones"""
+    for ext in ('.parquet', '.csv'):
+        path = os.path.join(folder, store.DEDUP_AGGREGATES_BASE + ext)
+        if os.path.exists(path):
+            os.remove(path)
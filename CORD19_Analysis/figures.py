@@ -0,0 +1,138 @@
+# figures.py: Headless export of analysis.py's PNGs, in parallel and only when their inputs changed
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')   # Never open a window; must run before seaborn imports pyplot
+from matplotlib.figure import Figure
+import seaborn as sns
+from wordcloud import WordCloud
+
+import profiling
+
+MANIFEST_FILE = 'figures_manifest.json'
+DPI = 300
+STYLE_VERSION = 1   # Bump when a figure's look changes, so every PNG is redrawn once
+
+YEAR_FILE = 'publications_by_year.png'
+JOURNALS_FILE = 'top_journals.png'
+WORDCLOUD_FILE = 'title_wordcloud.png'
+
+
+def _save(fig, path):
+    """Write a figure atomically, so an interrupted run never leaves a half-written PNG"""
+    tmp_path = path + '.tmp'
+    fig.savefig(tmp_path, format='png', dpi=DPI, bbox_inches='tight')
+    fig.clear()
+    os.replace(tmp_path, path)
+
+
+def plot_year(year_counts, path):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.bar(year_counts.index, year_counts.values, color='skyblue')
+    ax.set_title('COVID-19 Publications by Year')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Number of Publications')
+    ax.set_xticks(year_counts.index)
+    ax.grid(axis='y', alpha=0.3)
+    _save(fig, path)
+
+
+def plot_journals(top_journals, path):
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+    if len(top_journals):
+        sns.barplot(x=top_journals.values, y=top_journals.index, ax=ax, palette='viridis')
+    ax.set_title('Top 10 Journals by Publication Count')
+    ax.set_xlabel('Number of Publications')
+    fig.tight_layout()
+    _save(fig, path)
+
+
+def plot_wordcloud(frequencies, path):
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    if frequencies:
+        wordcloud = WordCloud(width=800, height=400, background_color='white')
+        wordcloud.generate_from_frequencies(frequencies)
+        ax.imshow(wordcloud, interpolation='bilinear')
+    ax.axis('off')
+    ax.set_title('Word Cloud of Paper Titles')
+    _save(fig, path)
+
+
+# name -> (file, renderer); the stage name in the profile is plot_<name>
+FIGURES = {
+    'year': (YEAR_FILE, plot_year),
+    'journals': (JOURNALS_FILE, plot_journals),
+    'wordcloud': (WORDCLOUD_FILE, plot_wordcloud),
+}
+
+
+def fingerprint(name, data):
+    """Hash of everything a figure is drawn from: its aggregate, the DPI and the style version"""
+    # Series keep their order (it is the drawing order); term counts are sorted, as their order is arbitrary
+    items = sorted(data.items()) if isinstance(data, dict) else data.items()
+    payload = json.dumps([name, DPI, STYLE_VERSION, [[str(key), float(value)] for key, value in items]])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def load_manifest(folder='.'):
+    try:
+        with open(os.path.join(folder, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, folder='.'):
+    path = os.path.join(folder, MANIFEST_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _render(job):
+    """Worker: draw one figure; returns its name and the worker's stage timings"""
+    name, data, path, cprofile = job
+    profiler = profiling.Profiler(cprofile)
+    with profiler.stage(f'plot_{name}'):
+        FIGURES[name][1](data, path)
+    profiler.stop()
+    return name, profiler
+
+
+def export(inputs, folder='.', workers=len(FIGURES), force=False, profiler=None):
+    """Draw the figures in inputs (name -> aggregate) whose inputs changed since the last export
+
+    Stale figures are drawn in up to `workers` processes (in this one with
+    workers <= 1); their render timings are added to profiler. Returns
+    {name: 'rendered' | 'unchanged'}.
+    """
+    manifest = load_manifest(folder)
+    status, jobs, fingerprints = {}, [], {}
+    for name, data in inputs.items():
+        path = os.path.join(folder, FIGURES[name][0])
+        fingerprints[name] = fingerprint(name, data)
+        if not force and os.path.exists(path) and manifest.get(name) == fingerprints[name]:
+            status[name] = 'unchanged'
+        else:
+            jobs.append((name, data, path, profiler is not None and profiler.cprofile))
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_render, jobs))
+    else:
+        results = [_render(job) for job in jobs]
+    for name, job_profiler in results:
+        if profiler is not None:
+            profiler.merge(job_profiler)
+        manifest[name] = fingerprints[name]
+        status[name] = 'rendered'
+    if results:
+        save_manifest(manifest, folder)
+    return status
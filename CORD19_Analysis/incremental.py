@@ -0,0 +1,91 @@
+# incremental.py: Remember how far metadata.csv was processed so reruns only parse new rows
+import hashlib
+import json
+import os
+
+import store
+
+STATE_FILE = 'analysis_state.json'
+FINGERPRINT_BLOCK = 16 * 1024 * 1024   # Bytes covered by each checkpoint hash of the processed part
+STATE_VERSION = 7
+
+
+def fingerprint(path, end, known=()):
+    """SHA-256 of each FINGERPRINT_BLOCK of path[:end] (the last one may be shorter)
+
+    Every processed byte is hashed, so an edit anywhere before end is seen.
+    known holds digests of leading full blocks already checked against this
+    file; they are reused instead of being read again.
+    """
+    digests = list(known[:end // FINGERPRINT_BLOCK])
+    with open(path, 'rb') as f:
+        position = f.seek(len(digests) * FINGERPRINT_BLOCK)
+        while position < end:
+            block = f.read(min(FINGERPRINT_BLOCK, end - position))
+            if not block:
+                break
+            digests.append(hashlib.sha256(block).hexdigest())
+            position += len(block)
+    return digests
+
+
+def load_state(path=STATE_FILE):
+    """Return the saved state, or None if there is none (or it is unreadable)"""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('version') == STATE_VERSION else None
+
+
+def save_state(state, path=STATE_FILE):
+    state = dict(state, version=STATE_VERSION)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def new_state(input_path, end, header, output, fmt, stats, previous=None):
+    """State after processing input_path up to end; previous is the state this run extended, if any"""
+    # Full blocks of the part the previous state covered were just checked by rebuild_reason
+    known = previous['fingerprint'][:previous['offset'] // FINGERPRINT_BLOCK] if previous else ()
+    return {
+        'input': os.path.abspath(input_path),
+        'offset': end,
+        'fingerprint': fingerprint(input_path, end, known),
+        'header': header,
+        'output': os.path.abspath(output),
+        'format': fmt,
+        'deltas': len(store.delta_files(output)),   # Delta files this state accounts for
+        'stats': stats,
+    }
+
+
+def rebuild_reason(state, input_path, output, fmt):
+    """Why the saved state can't be extended (None means metadata.csv only grew)"""
+    if state is None:
+        return "no saved state"
+    if state['input'] != os.path.abspath(input_path):
+        return "different input file"
+    if state['output'] != os.path.abspath(output) or state['format'] != fmt:
+        return "different output"
+    if not os.path.exists(output) or len(store.delta_files(output)) < state['deltas']:
+        return "cleaned output is missing"
+    if os.path.getsize(input_path) < state['offset']:
+        return "input file shrank"
+    if fingerprint(input_path, state['offset']) != state['fingerprint']:
+        return "already-processed rows changed"
+    return None
+
+
+def discard_uncommitted(state, output):
+    """Remove delta files written by a run that stopped before saving its state; returns their paths
+
+    Their rows are past the saved offset, so the next run parses them again.
+    """
+    extra = store.delta_files(output)[state['deltas']:]
+    for path in extra:
+        os.remove(path)
+    return extra
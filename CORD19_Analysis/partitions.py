@@ -0,0 +1,66 @@
+# partitions.py: Split a CSV file into byte ranges that start and end on record boundaries
+import os
+
+BLOCK_SIZE = 16 * 1024 * 1024
+
+
+def header_end(path):
+    """Byte offset just past the header line"""
+    with open(path, 'rb') as f:
+        f.readline()
+        return f.tell()
+
+
+def record_boundaries(path, start, end, parts):
+    """Return offsets start = b0 < b1 < ... = end that cut path[start:end] into ~`parts` ranges
+
+    Titles and abstracts may contain quoted newlines, so a newline only ends
+    a record when an even number of '"' came before it (escaped quotes are
+    doubled, which keeps the parity right). Counting quotes is one sequential
+    pass over the bytes, far cheaper than parsing them.
+    """
+    targets = [start + (end - start) * i // parts for i in range(1, parts)]
+    boundaries = [start]
+    quotes = 0
+    pos = start
+    with open(path, 'rb') as f:
+        f.seek(start)
+        for target in targets:
+            # Count quotes up to the target offset
+            while pos < target:
+                block = f.read(min(BLOCK_SIZE, target - pos))
+                quotes += block.count(b'"')
+                pos += len(block)
+            # Then move forward to the first newline outside quotes
+            boundary = None
+            while boundary is None:
+                block = f.read(min(BLOCK_SIZE, end - pos))
+                if not block:
+                    boundary = end
+                    break
+                i = 0
+                while True:
+                    j = block.find(b'\n', i)
+                    if j < 0:
+                        quotes += block.count(b'"', i)
+                        pos += len(block)
+                        break
+                    quotes += block.count(b'"', i, j)
+                    if quotes % 2 == 0:
+                        boundary = pos + j + 1
+                        break
+                    i = j + 1
+            pos = boundary
+            f.seek(pos)
+            if boundary > boundaries[-1] and boundary < end:
+                boundaries.append(boundary)
+    boundaries.append(end)
+    return boundaries
+
+
+def ranges(path, start=None, end=None, parts=os.cpu_count()):
+    """(start, end) byte ranges covering the records of path"""
+    start = header_end(path) if start is None else start
+    end = os.path.getsize(path) if end is None else end
+    bounds = record_boundaries(path, start, end, max(1, parts))
+    return list(zip(bounds[:-1], bounds[1:]))
@@ -0,0 +1,203 @@
+# profiling.py: Named stage timers with per-stage peak memory and optional cProfile dumps
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+REPORT_FILE = 'analysis_profile.json'
+SAMPLE_INTERVAL = 0.02   # Seconds between RSS samples while a stage runs
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def current_rss_mb():
+    """Resident memory right now (Linux); falls back to the peak so far elsewhere"""
+    try:
+        with open('/proc/self/statm') as f:
+            return round(int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024), 1)
+    except (OSError, IndexError, ValueError):
+        return peak_rss_mb()
+
+
+class Profiler:
+    """Wall time, call count and peak RSS per named stage
+
+    Stages may nest; time is charged to the innermost one, so the stage
+    times add up to the instrumented total. With cprofile=True every stage
+    also gets its own cProfile.Profile, and save() dumps the slowest one.
+    Profiles of worker processes travel back with their timings (as pstats
+    data) and are merged into the same stage's dump.
+    """
+
+    def __init__(self, cprofile=False):
+        self.cprofile = cprofile
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.peak_mb = {}
+        self.profiles = {}
+        self.merged_stats = defaultdict(list)   # stage -> pstats data of merged profilers
+        self.stack = []
+        self.started = None
+        self._sampler = None
+        self._stop = threading.Event()
+
+    def __getstate__(self):
+        # Only the measurements cross process boundaries (threads and profiles don't pickle; their stats do)
+        return {'seconds': dict(self.seconds), 'calls': dict(self.calls), 'peak_mb': self.peak_mb,
+                'cprofile': self.cprofile, 'stats': self.stage_stats()}
+
+    def __setstate__(self, state):
+        self.__init__(state['cprofile'])
+        self.seconds.update(state['seconds'])
+        self.calls.update(state['calls'])
+        self.peak_mb = state['peak_mb']
+        for name, stats in state['stats'].items():
+            self.merged_stats[name].extend(stats)
+
+    def stage_stats(self):
+        """{stage: [pstats data, ...]} of this profiler's cProfile runs and the ones merged into it"""
+        stats = {name: list(merged) for name, merged in self.merged_stats.items()}
+        for name, profile in self.profiles.items():
+            profile.create_stats()
+            stats.setdefault(name, []).append(dict(profile.stats))
+        return stats
+
+    def _charge(self, now):
+        name = self.stack[-1]
+        self.seconds[name] += now - self.started
+        self.started = now
+
+    def _record_memory(self):
+        if self.stack:
+            rss = current_rss_mb()
+            name = self.stack[-1]
+            if rss is not None and rss > self.peak_mb.get(name, 0):
+                self.peak_mb[name] = rss
+
+    def _sample(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            self._record_memory()
+
+    def _pause(self):
+        if self.stack and self.cprofile:
+            self.profiles[self.stack[-1]].disable()
+
+    def _resume(self):
+        if self.stack and self.cprofile:
+            self.profiles.setdefault(self.stack[-1], cProfile.Profile()).enable()
+
+    @contextmanager
+    def stage(self, name):
+        now = time.perf_counter()
+        if self.stack:
+            self._charge(now)
+            self._pause()
+        elif self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+        self.stack.append(name)
+        self.calls[name] += 1
+        self.started = now
+        self._record_memory()
+        self._resume()
+        try:
+            yield
+        finally:
+            self._pause()
+            self._record_memory()
+            self._charge(time.perf_counter())
+            self.stack.pop()
+            self._resume()
+
+    def iterate(self, name, iterable):
+        """Yield from iterable, charging the time spent producing each item to `name`"""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                item = next(iterator, StopIteration)
+            if item is StopIteration:
+                return
+            yield item
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    def merge(self, other):
+        """Add the timings of another profiler (e.g. from a worker process)"""
+        for name, seconds in other.seconds.items():
+            self.seconds[name] += seconds
+            self.calls[name] += other.calls[name]
+        for name, peak in other.peak_mb.items():
+            self.peak_mb[name] = max(peak, self.peak_mb.get(name, 0))
+        if self.cprofile:
+            for name, stats in other.stage_stats().items():
+                self.merged_stats[name].extend(stats)
+
+    def slowest(self):
+        return max(self.seconds, key=self.seconds.get) if self.seconds else None
+
+    def report(self):
+        return {
+            'total_seconds': round(sum(self.seconds.values()), 4),
+            'slowest_stage': self.slowest(),
+            'peak_rss_mb': peak_rss_mb(),
+            'stages': {name: {'seconds': round(seconds, 4), 'calls': self.calls[name],
+                              'peak_rss_mb': self.peak_mb.get(name)}
+                       for name, seconds in sorted(self.seconds.items(), key=lambda item: -item[1])},
+        }
+
+    def print_report(self):
+        print(f"\n{'Stage':<20} {'Seconds':>9} {'Calls':>6} {'Peak RSS':>10}")
+        for name, row in self.report()['stages'].items():
+            peak = f"{row['peak_rss_mb']:.1f}MB" if row['peak_rss_mb'] is not None else '-'
+            print(f"{name:<20} {row['seconds']:9.3f} {row['calls']:6d} {peak:>10}")
+
+    def save(self, folder='.', extra=None):
+        """Write the JSON report (and, with cprofile, a .prof dump of the slowest stage) to folder"""
+        report = dict(extra or {}, **self.report())
+        if self.cprofile:
+            stage_stats = self.stage_stats()
+            # The slowest stage with cProfile data (a stage run by a worker without it has none)
+            profiled = [name for name in report['stages'] if stage_stats.get(name)]
+            if profiled:
+                name = profiled[0]
+                if name != report['slowest_stage']:
+                    report['cprofile_note'] = (f"no cProfile data for the slowest stage "
+                                               f"{report['slowest_stage']}; dumped {name} instead")
+                    print(f"cProfile: {report['cprofile_note']}")
+                combined = pstats.Stats()
+                for data in stage_stats[name]:
+                    part = pstats.Stats()
+                    part.stats = data
+                    part.get_top_level_stats()
+                    combined.add(part)
+                prof_path = os.path.join(folder, f'analysis_profile_{name}.prof')
+                combined.dump_stats(prof_path)
+                report['cprofile_dump'] = prof_path
+        path = os.path.join(folder, REPORT_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp_path, path)
+        return path
@@ -0,0 +1,82 @@
+# sampling.py: One-pass uniform (optionally stratified) row samples of metadata.csv
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+KEY = '_sample_key'      # Random priority of each row; the sample is the rows with the smallest keys
+ROW = '_sample_row'      # Position in the file, to put the sample back in file order
+STRATUM = '_sample_stratum'
+
+
+def stratum_labels(strata):
+    """Labels of a chunk's strata as strings (missing values are the stratum '')"""
+    return strata.astype(str).where(strata.notna(), '').to_numpy()
+
+
+def count_strata(chunks):
+    """Rows per stratum label, from chunks of strata Series (the first pass of a stratified sample)"""
+    counts = Counter()
+    for strata in chunks:
+        counts.update(Counter(stratum_labels(strata)))
+    return counts
+
+
+def allocation(size, counts):
+    """Sample size per stratum, proportional to its rows (largest remainders get the leftovers)"""
+    total = sum(counts.values())
+    if total == 0:
+        return {}
+    size = min(size, total)
+    labels = sorted(counts)
+    quotas = np.array([counts[label] for label in labels]) * size / total
+    quota_counts = np.floor(quotas).astype(int)
+    leftover = size - quota_counts.sum()
+    quota_counts[np.argsort(-(quotas - quota_counts), kind='stable')[:leftover]] += 1
+    return dict(zip(labels, quota_counts))
+
+
+class Reservoir:
+    """Uniform sample of `size` rows from a stream of chunks
+
+    Every row gets a random key and the sample is the `size` rows with the
+    smallest keys, which is a uniform sample without replacement. Only those
+    rows are ever held, and because keys are drawn row by row from one seeded
+    generator the sample does not depend on the chunk size.
+
+    For a stratified sample, pass strata: the rows per stratum label, counted
+    by a first pass over the file (count_strata()). Each stratum then keeps
+    its own reservoir, sized to its share of `size` (allocation()), so at
+    most `size` rows are held in total. update() takes the chunk's strata.
+    """
+
+    def __init__(self, size, seed=0, strata=None):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.quotas = allocation(size, strata) if strata is not None else None
+        self.seen = 0
+        self.rows = None
+
+    def update(self, chunk, strata=None):
+        keys = self.rng.random(len(chunk))
+        chunk = chunk.assign(**{KEY: keys, ROW: np.arange(self.seen, self.seen + len(chunk))})
+        self.seen += len(chunk)
+        if self.quotas is not None:
+            chunk[STRATUM] = stratum_labels(strata)
+        elif self.rows is not None and len(self.rows) == self.size:
+            # Most rows can't beat the current sample; drop them before concatenating
+            chunk = chunk[chunk[KEY] < self.rows[KEY].max()]
+        rows = chunk if self.rows is None else pd.concat([self.rows, chunk], ignore_index=True)
+        if self.quotas is not None:
+            # Strata the first pass didn't see (the file changed in between) get no rows
+            quota = rows[STRATUM].map(self.quotas).fillna(0).to_numpy()
+            self.rows = rows[rows.groupby(STRATUM)[KEY].rank(method='first').to_numpy() <= quota]
+        else:
+            self.rows = rows.nsmallest(self.size, KEY) if len(rows) > self.size else rows
+
+    def result(self):
+        """The sample in file order, with a fresh index"""
+        if self.rows is None:
+            return pd.DataFrame()
+        rows = self.rows.sort_values(ROW)
+        return rows.drop(columns=[KEY, ROW, STRATUM], errors='ignore').reset_index(drop=True)
@@ -0,0 +1,88 @@
+# schema.py: Declared schema of CORD-19 metadata.csv: which columns are read, their dtypes and a memory budget
+import io
+import os
+import sys
+
+import pandas as pd
+
+import partitions
+
+# The only columns analysis.py and the dashboard use; the rest of metadata.csv is never parsed.
+# Repeated values are read as categoricals, so each distinct string is held once per chunk.
+COLUMNS = {
+    'title': str,
+    'abstract': str,
+    'publish_time': 'category',   # A few thousand distinct dates over millions of rows
+    'journal': 'category',
+    'source_x': 'category',
+    'source': 'category',         # Name of source_x in older releases
+}
+# Categoricals whose labels are interned, so every chunk (and every count keyed by them) shares one str
+INTERNED_COLUMNS = ['journal', 'source_x', 'source']
+YEAR_DTYPE = 'int16'              # Derived from publish_time by the cleaning step
+
+SAMPLE_BYTES = 4 * 1024 * 1024    # Start of the file read to estimate memory per row
+
+
+class MemoryBudgetError(MemoryError):
+    """Loading would use more memory than the budget; report holds the per-column estimate"""
+
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+
+def usecols(name):
+    return name in COLUMNS
+
+
+def read_options():
+    """Keyword arguments for pd.read_csv that apply the schema"""
+    return {'usecols': usecols, 'dtype': COLUMNS, 'low_memory': False}
+
+
+def intern_categories(df):
+    """Replace the labels of the interned categoricals with interned strings (in place)"""
+    for col in INTERNED_COLUMNS:
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            categories = df[col].cat.categories
+            df[col] = df[col].cat.rename_categories([sys.intern(str(value)) for value in categories])
+    return df
+
+
+def memory_report(df, rows=None):
+    """Memory per column (MB) of df, or of `rows` rows like it, largest first"""
+    usage = df.memory_usage(deep=True, index=False)
+    if rows is not None:
+        usage = usage / max(len(df), 1) * rows
+    report = pd.DataFrame({'dtype': df.dtypes.astype(str), 'MB': (usage / 1024 ** 2).round(1)})
+    return report.sort_values('MB', ascending=False)
+
+
+def estimate(path, sample_bytes=SAMPLE_BYTES, options=None):
+    """Read the records in the first sample_bytes of path; returns (sample, estimated rows in the file)
+
+    options are pd.read_csv keyword arguments (the metadata schema by default).
+    """
+    header = list(pd.read_csv(path, nrows=0).columns)
+    start = partitions.header_end(path)
+    size = os.path.getsize(path)
+    end = min(size, start + 2 * sample_bytes)
+    # Cut the sample at the first record boundary past start + sample_bytes
+    stop = partitions.record_boundaries(path, start, end, 2)[1] if end < size else size
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = io.BytesIO(f.read(stop - start))
+    sample = pd.read_csv(data, header=None, names=header, **(read_options() if options is None else options))
+    intern_categories(sample)
+    if stop == size or stop == start:
+        return sample, len(sample)
+    return sample, round(len(sample) * (size - start) / (stop - start))
+
+
+def check_budget(report, budget_mb, what):
+    """Raise MemoryBudgetError if the memory_report() total is over budget_mb (None means no budget)"""
+    total = report['MB'].sum()
+    if budget_mb is not None and total > budget_mb:
+        raise MemoryBudgetError(f"{what} needs about {total:.0f} MB, over the {budget_mb:.0f} MB budget", report)
+    return total
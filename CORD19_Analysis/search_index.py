@@ -0,0 +1,219 @@
+# search_index.py: Inverted index over titles and abstracts, memory-mapped for the dashboard
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from wordcloud import STOPWORDS
+
+import store
+from terms import TOKEN_PATTERN
+
+MAX_TERM_LENGTH = 32       # Longer tokens are cut (they are almost always noise)
+BATCH_ROWS = 50000         # Documents tokenized at a time while building
+SCATTER_BLOCK = 4_000_000  # Postings moved at a time in the second pass
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Files in the index folder; all but meta.json are .npy arrays opened with mmap
+VOCAB = 'vocab.npy'              # Sorted terms (fixed-width unicode)
+OFFSETS = 'offsets.npy'          # Postings of term i are [offsets[i], offsets[i + 1])
+POSTING_DOCS = 'posting_docs.npy'
+POSTING_TF = 'posting_tf.npy'
+DOC_LENGTHS = 'doc_lengths.npy'
+DOC_YEARS = 'doc_years.npy'
+META = 'meta.json'
+
+
+def tokenize(text):
+    """Lower-cased tokens of a Series of strings (one list per row), without stopwords and numbers"""
+    tokens = text.fillna('').str.lower().str.findall(TOKEN_PATTERN)
+    return tokens.apply(lambda words: [w[:MAX_TERM_LENGTH] for w in words
+                                       if w not in STOPWORDS and not w.isdigit()])
+
+
+def _document_text(batch):
+    text = batch['title'].fillna('').astype(str)
+    if 'abstract' in batch.columns:
+        text = text + ' ' + batch['abstract'].fillna('').astype(str)
+    return text
+
+
+def build(folder='.', batch_rows=BATCH_ROWS):
+    """Index the cleaned data in folder; doc ids are row positions in load_cleaned() order
+
+    Returns the build id saved in meta.json; the snapshot published with
+    this data records it, so the dashboard never pairs the index with other rows.
+
+    Pass 1 tokenizes batches and spills (term, doc, tf) triples to temporary
+    files, so memory holds one batch plus the vocabulary. Pass 2 moves the
+    triples into per-term postings lists with a counting sort.
+    """
+    out_dir = os.path.join(folder, store.SEARCH_INDEX_DIR)
+    build_id = f'i{time.time_ns()}'
+    build_dir = out_dir + '.tmp'
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+
+    vocab = {}
+    doc_freq = np.zeros(0, dtype=np.int64)
+    doc_lengths, doc_years = [], []
+    n_docs = 0
+    with tempfile.TemporaryDirectory(dir=folder or '.') as spill_dir:
+        spill_paths = [os.path.join(spill_dir, name) for name in ('terms', 'docs', 'tf')]
+        spills = [open(path, 'wb') for path in spill_paths]
+        try:
+            for batch in store.iter_cleaned(['title', 'abstract', 'year'], batch_rows, folder):
+                tokens = tokenize(_document_text(batch))
+                doc_ids = np.arange(n_docs, n_docs + len(batch), dtype=np.int32)
+                doc_lengths.append(tokens.str.len().to_numpy(dtype=np.uint32))
+                doc_years.append(batch['year'].to_numpy(dtype=np.int16))
+                n_docs += len(batch)
+
+                pairs = pd.DataFrame({'doc': doc_ids, 'term': tokens.to_numpy()}).explode('term').dropna()
+                if pairs.empty:
+                    continue
+                counts = pairs.groupby(['doc', 'term'], sort=True).size()
+                codes, uniques = pd.factorize(counts.index.get_level_values('term'))
+                term_ids = np.array([vocab.setdefault(t, len(vocab)) for t in uniques], dtype=np.int32)[codes]
+                spills[0].write(term_ids.tobytes())
+                spills[1].write(counts.index.get_level_values('doc').to_numpy(dtype=np.int32).tobytes())
+                spills[2].write(np.minimum(counts.to_numpy(), 65535).astype(np.uint16).tobytes())
+
+                if len(vocab) > len(doc_freq):
+                    doc_freq = np.concatenate([doc_freq, np.zeros(len(vocab) - len(doc_freq), dtype=np.int64)])
+                doc_freq += np.bincount(term_ids, minlength=len(doc_freq))
+        finally:
+            for f in spills:
+                f.close()
+
+        # Number terms in sorted order so queries can binary-search the vocabulary
+        terms = np.array(list(vocab), dtype=f'U{MAX_TERM_LENGTH}')
+        order = np.argsort(terms, kind='stable')
+        new_id = np.empty(len(order), dtype=np.int32)
+        new_id[order] = np.arange(len(order), dtype=np.int32)
+        np.save(os.path.join(build_dir, VOCAB), terms[order])
+        offsets = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(doc_freq[order], out=offsets[1:])
+        np.save(os.path.join(build_dir, OFFSETS), offsets)
+
+        total = int(offsets[-1])
+        posting_docs = np.lib.format.open_memmap(os.path.join(build_dir, POSTING_DOCS), mode='w+',
+                                                 dtype=np.int32, shape=(total,))
+        posting_tf = np.lib.format.open_memmap(os.path.join(build_dir, POSTING_TF), mode='w+',
+                                               dtype=np.uint16, shape=(total,))
+        cursor = offsets[:-1].copy()
+        with open(spill_paths[0], 'rb') as f_terms, open(spill_paths[1], 'rb') as f_docs, \
+                open(spill_paths[2], 'rb') as f_tf:
+            while True:
+                term_ids = np.fromfile(f_terms, dtype=np.int32, count=SCATTER_BLOCK)
+                if not len(term_ids):
+                    break
+                docs = np.fromfile(f_docs, dtype=np.int32, count=len(term_ids))
+                tf = np.fromfile(f_tf, dtype=np.uint16, count=len(term_ids))
+                term_ids = new_id[term_ids]
+                # Stable sort keeps docs ascending within each term
+                by_term = np.argsort(term_ids, kind='stable')
+                sorted_terms = term_ids[by_term]
+                starts = np.flatnonzero(np.r_[True, sorted_terms[1:] != sorted_terms[:-1]])
+                run_lengths = np.diff(np.r_[starts, len(sorted_terms)])
+                rank = np.arange(len(sorted_terms)) - np.repeat(starts, run_lengths)
+                positions = cursor[sorted_terms] + rank
+                posting_docs[positions] = docs[by_term]
+                posting_tf[positions] = tf[by_term]
+                cursor[sorted_terms[starts]] += run_lengths
+        posting_docs.flush()
+        posting_tf.flush()
+        del posting_docs, posting_tf
+
+    lengths = np.concatenate(doc_lengths) if doc_lengths else np.zeros(0, dtype=np.uint32)
+    np.save(os.path.join(build_dir, DOC_LENGTHS), lengths)
+    np.save(os.path.join(build_dir, DOC_YEARS),
+            np.concatenate(doc_years) if doc_years else np.zeros(0, dtype=np.int16))
+    with open(os.path.join(build_dir, META), 'w') as f:
+        json.dump({'build': build_id, 'documents': n_docs, 'terms': len(vocab), 'postings': total,
+                   'average_length': float(lengths.mean()) if n_docs else 0.0}, f)
+
+    # Swap the finished index into place
+    old_dir = out_dir + '.old'
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old_dir)
+    os.replace(build_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return build_id
+
+
+class SearchIndex:
+    """Read-only, memory-mapped view of an index written by build()"""
+
+    def __init__(self, folder='.'):
+        path = os.path.join(folder, store.SEARCH_INDEX_DIR)
+        if not os.path.exists(os.path.join(path, META)):
+            raise FileNotFoundError("No search index found. Run 'python analysis.py' first.")
+        with open(os.path.join(path, META)) as f:
+            self.meta = json.load(f)
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode='r')
+        self.vocab = load(VOCAB)
+        self.offsets = load(OFFSETS)
+        self.posting_docs = load(POSTING_DOCS)
+        self.posting_tf = load(POSTING_TF)
+        self.doc_lengths = load(DOC_LENGTHS)
+        self.doc_years = load(DOC_YEARS)
+
+    def postings(self, term):
+        """(docs, tf) arrays for one term; empty if the term is unknown"""
+        term = term[:MAX_TERM_LENGTH]
+        i = int(np.searchsorted(self.vocab, term))
+        if i >= len(self.vocab) or self.vocab[i] != term:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.uint16)
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        return self.posting_docs[lo:hi], self.posting_tf[lo:hi]
+
+    def search(self, query, min_year=None, max_year=None, page=1, page_size=10):
+        """Documents containing every query term, ranked by BM25
+
+        Returns (doc_ids, scores, total_hits) for the requested page.
+        """
+        words = list(dict.fromkeys(tokenize(pd.Series([query])).iloc[0]))
+        if not words:
+            return np.zeros(0, dtype=np.int64), np.zeros(0), 0
+        n_docs = self.meta['documents']
+        average_length = self.meta['average_length'] or 1.0
+        # Rarest term first keeps the candidate set small
+        lists = sorted((self.postings(word) for word in words), key=lambda p: len(p[0]))
+        docs, tf = lists[0]
+        scores = np.zeros(len(docs))
+        for i, (term_docs, term_tf) in enumerate(lists):
+            if i:
+                keep = np.isin(docs, term_docs, assume_unique=True)
+                docs, scores = docs[keep], scores[keep]
+                tf = term_tf[np.searchsorted(term_docs, docs)]
+            if not len(docs):
+                return np.zeros(0, dtype=np.int64), np.zeros(0), 0
+            idf = math.log(1 + (n_docs - len(term_docs) + 0.5) / (len(term_docs) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[docs] / average_length)
+            scores += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        if min_year is not None or max_year is not None:
+            years = self.doc_years[docs]
+            in_range = np.ones(len(docs), dtype=bool)
+            if min_year is not None:
+                in_range &= years >= min_year
+            if max_year is not None:
+                in_range &= years <= max_year
+            docs, scores = docs[in_range], scores[in_range]
+
+        total = len(docs)
+        end = min(page * page_size, total)
+        start = min((page - 1) * page_size, end)
+        if end == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0), total
+        # Only the results up to this page need a full sort
+        best = np.argpartition(-scores, end - 1)[:end] if end < total else np.arange(total)
+        best = best[np.lexsort((docs[best], -scores[best]))][start:end]
+        return np.asarray(docs[best], dtype=np.int64), scores[best], total
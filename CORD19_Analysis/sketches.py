@@ -0,0 +1,122 @@
+# sketches.py: Fixed-memory heavy-hitter counts for the long-tailed journal and source columns
+import math
+
+import pandas as pd
+
+DEFAULT_ERROR = 0.001   # Counts are within this fraction of the rows seen
+
+
+class HeavyHitters:
+    """Space-Saving / Misra-Gries summary of value counts
+
+    At most `capacity` values are kept, with capacity = ceil(1 / error) - 1.
+    Each kept count is a lower bound on the true count and is short by at
+    most `error_bound`, which never exceeds error * n; values that were
+    dropped occurred at most `error_bound` times. Summaries of separate
+    chunks, partitions or corpus releases merge into one with the same
+    guarantee (Agarwal et al., "Mergeable Summaries").
+    """
+
+    def __init__(self, error=DEFAULT_ERROR):
+        if not 0 < error < 1:
+            raise ValueError("error must be between 0 and 1")
+        self.error = error
+        self.capacity = max(1, math.ceil(1 / error) - 1)
+        self.counts = pd.Series(dtype='int64')
+        self.n = 0
+        self.decremented = 0   # Sum of the amounts taken off every counter so far
+
+    @property
+    def error_bound(self):
+        """Largest amount any count can be short by"""
+        # Every cut takes at least capacity + 1 times its size out of the total,
+        # so this is at most n / (capacity + 1) <= error * n
+        return self.decremented
+
+    def update(self, values):
+        """Count a Series of values (NaN is ignored)"""
+        counts = values.value_counts()
+        # Categoricals also list the categories that don't occur
+        counts = counts[counts > 0].rename(index=str)
+        self.add_counts(counts)
+
+    def add_counts(self, counts):
+        """Count values that were already tallied: a Series of value -> count"""
+        self._add(counts.astype('int64'), int(counts.sum()), 0)
+
+    def merge(self, other):
+        """Fold in another summary built with the same error"""
+        if other.capacity != self.capacity:
+            raise ValueError("can only merge sketches built with the same error")
+        self._add(other.counts, other.n, other.decremented)
+
+    def _add(self, counts, n, decremented):
+        combined = self.counts.add(counts, fill_value=0).astype('int64')
+        self.n += n
+        self.decremented += decremented
+        if len(combined) > self.capacity:
+            # Take the (capacity + 1)-th largest count off every value and drop what hits zero
+            cut = int(combined.nlargest(self.capacity + 1, keep='all').iloc[self.capacity])
+            combined = combined[combined > cut] - cut
+            self.decremented += cut
+        self.counts = combined
+
+    def top(self, n):
+        """n largest counts, ties broken by name so every run orders them the same"""
+        order = sorted(self.counts.items(), key=lambda item: (-item[1], str(item[0])))[:n]
+        return pd.Series(dict(order), dtype='int64')
+
+    def to_state(self):
+        return {'error': self.error, 'n': self.n, 'decremented': self.decremented,
+                'counts': [[value, int(count)] for value, count in self.counts.items()]}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['error'])
+        sketch.n = state['n']
+        sketch.decremented = state['decremented']
+        sketch.counts = pd.Series(dict((value, count) for value, count in state['counts']), dtype='int64')
+        return sketch
+
+
+class YearHeavyHitters:
+    """One HeavyHitters per year, so every year keeps its own top values"""
+
+    def __init__(self, error=DEFAULT_ERROR):
+        self.error = error
+        self.years = {}
+
+    def update(self, years, values):
+        for year, group in values.groupby(years.to_numpy()):
+            self.years.setdefault(int(year), HeavyHitters(self.error)).update(group)
+
+    def add_pair_counts(self, counts):
+        """Count values that were already tallied: a Series of counts indexed by (year, value)"""
+        for year, year_counts in counts.groupby(level=0):
+            self.years.setdefault(int(year), HeavyHitters(self.error)).add_counts(year_counts.droplevel(0))
+
+    def merge(self, other):
+        for year, sketch in other.years.items():
+            self.years.setdefault(year, HeavyHitters(self.error)).merge(sketch)
+
+    def pair_counts(self):
+        """{(year, value): count} of the kept values, the shape cube.counts_frame takes"""
+        return {(year, value): int(count)
+                for year, sketch in self.years.items() for value, count in sketch.counts.items()}
+
+    def year_errors(self):
+        """{year: largest amount that year's counts can be short by}"""
+        return {year: sketch.error_bound for year, sketch in self.years.items()}
+
+    def error_bound(self):
+        """Largest amount a count summed over all years can be short by"""
+        return sum(self.year_errors().values())
+
+    def to_state(self):
+        return {'error': self.error, 'years': [[year, sketch.to_state()] for year, sketch in self.years.items()]}
+
+    @classmethod
+    def from_state(cls, state):
+        sketches = cls(state['error'])
+        sketches.years = {year: HeavyHitters.from_state(s) for year, s in state['years']}
+        return sketches
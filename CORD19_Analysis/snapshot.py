@@ -0,0 +1,263 @@
+# snapshot.py: Read-only, memory-mapped copy of what the dashboard reads, shared by its sessions and processes
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+import cube
+import store
+import terms
+
+BATCH_ROWS = 100000
+CURRENT = 'CURRENT'    # Name of the published version; replaced atomically
+META = 'meta.json'
+# Files of a version folder besides meta.json, all raw arrays opened with np.memmap:
+#   <table>.<column>.values      numbers
+#   <table>.<column>.codes       int32 codes (-1 = missing) of a categorical; labels in <column>.labels.npy
+#   <table>.<column>.data/.ends  UTF-8 text of every row, back to back, and where each row's text ends
+YEAR_ORDER = 'year_order'     # Rows sorted by year (stable), and their years: cube.YearIndex without the sort
+DEDUP_YEAR_ORDER = 'dedup_year_order'   # The same for the first row of each --dedup cluster
+
+
+class _TableWriter:
+    """Append DataFrame batches to one raw file per column"""
+
+    def __init__(self, path, name):
+        self.path = path
+        self.name = name
+        self.rows = 0
+        self.columns = {}   # column -> {'kind': ..., 'dtype': ...}
+        self.labels = {}    # categorical column -> {label: code}
+        self.text_bytes = {}
+        self.files = {}
+
+    def _append(self, column, part, values):
+        key = (column, part)
+        if key not in self.files:
+            self.files[key] = open(os.path.join(self.path, f'{self.name}.{column}.{part}'), 'wb')
+        np.ascontiguousarray(values).tofile(self.files[key])
+
+    def write(self, df):
+        for column in df.columns:
+            values = df[column]
+            if column not in self.columns:
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    self.columns[column] = {'kind': 'category', 'dtype': 'int32'}
+                elif pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+                    self.columns[column] = {'kind': 'number', 'dtype': values.dtype.str}
+                else:
+                    self.columns[column] = {'kind': 'text', 'dtype': 'int64'}
+            kind = self.columns[column]['kind']
+            if kind == 'category':
+                # Codes of each batch are mapped onto one set of labels for the whole table
+                labels = self.labels.setdefault(column, {})
+                values = values.astype('category')
+                mapping = [labels.setdefault(str(label), len(labels)) for label in values.cat.categories]
+                mapping = np.array(mapping + [-1], dtype=np.int32)
+                self._append(column, 'codes', mapping[values.cat.codes.to_numpy()])
+            elif kind == 'number':
+                self._append(column, 'values', values.to_numpy(dtype=self.columns[column]['dtype']))
+            else:
+                encoded = [value.encode('utf-8') if isinstance(value, str) else b'' for value in values]
+                ends = self.text_bytes.get(column, 0) + np.cumsum([len(e) for e in encoded], dtype=np.int64)
+                self._append(column, 'data', np.frombuffer(b''.join(encoded), dtype=np.uint8))
+                self._append(column, 'ends', ends)
+                if len(ends):
+                    self.text_bytes[column] = int(ends[-1])
+        self.rows += len(df)
+
+    def close(self):
+        """Close the files; returns the table's entry for meta.json"""
+        for f in self.files.values():
+            f.close()
+        for column, labels in self.labels.items():
+            np.save(os.path.join(self.path, f'{self.name}.{column}.labels.npy'), np.array(list(labels), dtype=str))
+        return {'rows': self.rows, 'columns': self.columns}
+
+
+def _write_table(path, name, batches):
+    writer = _TableWriter(path, name)
+    for batch in batches:
+        writer.write(batch)
+    return writer.close()
+
+
+def _map(path, dtype, length):
+    if length == 0 or not os.path.exists(path):
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(length,))
+
+
+class Table:
+    """Read-only view of a table written by publish(); columns are memory-mapped, never copied whole"""
+
+    def __init__(self, path, name, meta):
+        self.name = name
+        self.rows = meta['rows']
+        self.columns = meta['columns']
+        self.arrays = {}
+        self.labels = {}
+        for column, info in self.columns.items():
+            prefix = os.path.join(path, f'{name}.{column}.')
+            if info['kind'] == 'category':
+                self.arrays[column] = _map(prefix + 'codes', np.int32, self.rows)
+                self.labels[column] = np.load(prefix + 'labels.npy').astype(object)
+            elif info['kind'] == 'number':
+                self.arrays[column] = _map(prefix + 'values', np.dtype(info['dtype']), self.rows)
+            else:
+                ends = _map(prefix + 'ends', np.int64, self.rows)
+                data = _map(prefix + 'data', np.uint8, int(ends[-1]) if len(ends) else 0)
+                self.arrays[column] = (data, ends)
+
+    def __len__(self):
+        return self.rows
+
+    def column(self, name):
+        """The mapped array of a number column"""
+        return self.arrays[name]
+
+    def _values(self, column, rows):
+        info = self.columns[column]
+        if info['kind'] == 'category':
+            codes = self.arrays[column][rows]
+            labels = np.append(self.labels[column], None)   # Code -1 picks the None at the end
+            return pd.Categorical(labels[codes], categories=self.labels[column])
+        if info['kind'] == 'number':
+            return np.asarray(self.arrays[column][rows])
+        data, ends = self.arrays[column]
+        starts = np.where(rows > 0, ends[np.maximum(rows - 1, 0)], 0) if len(rows) else rows
+        return [bytes(data[start:end]).decode('utf-8') for start, end in zip(starts, ends[rows])]
+
+    def take(self, rows, columns=None):
+        """DataFrame of the given row positions (only these rows are read from the files)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = [c for c in columns if c in self.columns] if columns else list(self.columns)
+        return pd.DataFrame({column: self._values(column, rows) for column in columns},
+                            index=pd.Index(rows))
+
+    def frame(self, columns=None):
+        """The whole table as a DataFrame; for the small aggregate tables"""
+        return self.take(np.arange(self.rows), columns).reset_index(drop=True)
+
+    def memory_report(self):
+        """Mapped size per column (MB), in schema.memory_report()'s format"""
+        sizes = {}
+        for column, array in self.arrays.items():
+            arrays = array if isinstance(array, tuple) else (array,)
+            sizes[column] = sum(a.nbytes for a in arrays)
+        dtypes = {column: info['kind'] if info['kind'] != 'number' else info['dtype']
+                  for column, info in self.columns.items()}
+        report = pd.DataFrame({'dtype': pd.Series(dtypes), 'MB': (pd.Series(sizes) / 1024 ** 2).round(1)})
+        return report.sort_values('MB', ascending=False)
+
+
+def current_version(folder='.'):
+    """Name of the published snapshot, or None; cheap enough to check on every dashboard rerun"""
+    try:
+        with open(os.path.join(folder, store.SNAPSHOT_DIR, CURRENT)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def publish(folder='.', batch_rows=BATCH_ROWS, search_index=None):
+    """Write a new snapshot of the cleaned data's dashboard columns and the aggregate tables
+
+    search_index is the build id of the search index made from the same
+    cleaned data (search_index.build() returns it), or None if there is none.
+
+    It goes into a new version folder and becomes current with one atomic
+    rename of the CURRENT file, so readers see either the old snapshot or
+    the new one. Earlier versions are removed (processes that still map
+    them keep their files until they switch). Returns the version.
+    """
+    root = os.path.join(folder, store.SNAPSHOT_DIR)
+    os.makedirs(root, exist_ok=True)
+    version = f'v{time.time_ns()}'
+    build_dir = os.path.join(root, version + '.tmp')
+    os.makedirs(build_dir)
+    try:
+        tables = {'rows': _write_table(build_dir, 'rows',
+                                       store.iter_cleaned(store.DASHBOARD_COLUMNS, batch_rows, folder))}
+        rows = Table(build_dir, 'rows', tables['rows'])
+        try:
+            counts = cube.load(folder)
+        except FileNotFoundError:  # Output from an older analysis.py run
+            counts = cube.counts_from_batches(
+                store.iter_cleaned(['year', 'journal', 'source_x', 'source'], batch_rows, folder))
+        tables['aggregates'] = _write_table(build_dir, 'aggregates', [counts])
+        for name, load in (('aggregates_dedup', lambda: cube.load(folder, deduplicated=True)),
+                           ('terms', lambda: terms.load(folder))):
+            try:
+                tables[name] = _write_table(build_dir, name, [load()])
+            except FileNotFoundError:
+                pass
+
+        # Year order for the sample table, so no dashboard process has to sort the rows
+        years = np.asarray(rows.column('year')) if 'year' in rows.columns else np.zeros(0, dtype=np.int16)
+        orders = {YEAR_ORDER: np.arange(len(years))}
+        if 'cluster_id' in rows.columns and 'aggregates_dedup' in tables:
+            orders[DEDUP_YEAR_ORDER] = np.flatnonzero(np.asarray(rows.column('cluster_id')) == orders[YEAR_ORDER])
+        for name, candidates in orders.items():
+            order = candidates[np.argsort(years[candidates], kind='stable')].astype(np.int64)
+            order.tofile(os.path.join(build_dir, name + '.order'))
+            years[order].tofile(os.path.join(build_dir, name + '.years'))
+        del rows
+
+        with open(os.path.join(build_dir, META), 'w') as f:
+            json.dump({'version': version, 'search_index': search_index, 'tables': tables,
+                       'orders': {name: len(candidates) for name, candidates in orders.items()}}, f)
+        os.replace(build_dir, os.path.join(root, version))
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+    tmp_path = os.path.join(root, CURRENT + '.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(root, CURRENT))
+    for name in os.listdir(root):
+        # Folders still being built (by another publisher) end in .tmp and are left alone
+        if name != version and not name.endswith('.tmp') and os.path.isdir(os.path.join(root, name)):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return version
+
+
+class Snapshot:
+    """The published snapshot: the dashboard's rows and aggregate tables, memory-mapped
+
+    Every process that opens the same version maps the same files, so the
+    operating system keeps one copy of the data in its page cache however
+    many dashboard processes and sessions read it.
+    """
+
+    def __init__(self, folder='.', version=None):
+        version = version or current_version(folder)
+        path = os.path.join(folder, store.SNAPSHOT_DIR, version or '')
+        if version is None or not os.path.exists(os.path.join(path, META)):
+            raise FileNotFoundError("No dashboard snapshot found. Run 'python analysis.py' first.")
+        with open(os.path.join(path, META)) as f:
+            meta = json.load(f)
+        self.version = meta['version']
+        self.search_index = meta.get('search_index')   # Build id of the matching search index, or None
+        self.tables = {name: Table(path, name, table) for name, table in meta['tables'].items()}
+        self.rows = self.tables['rows']
+        self.year_indexes = {
+            name: cube.YearIndex.from_arrays(_map(os.path.join(path, name + '.order'), np.int64, length),
+                                             _map(os.path.join(path, name + '.years'), np.int16, length))
+            for name, length in meta['orders'].items()}
+
+    def table(self, name):
+        """A small table (aggregates, aggregates_dedup, terms) as a DataFrame, or None if it wasn't written"""
+        return self.tables[name].frame() if name in self.tables else None
+
+    def year_index(self, deduplicated=False):
+        return self.year_indexes.get(DEDUP_YEAR_ORDER if deduplicated else YEAR_ORDER)
+
+
+if __name__ == '__main__':
+    # Publish the outputs of an earlier analysis.py run without rerunning it
+    print(f"Published snapshot {publish()}")
@@ -0,0 +1,262 @@
+# store.py: Typed columnar storage for the cleaned CORD-19 metadata
+import glob
+import os
+import shutil
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; everything falls back to CSV
+    pa = pq = None
+
+CLEANED_BASE = 'cleaned_metadata'
+AGGREGATES_BASE = 'cleaned_aggregates'
+DEDUP_AGGREGATES_BASE = 'cleaned_aggregates_dedup'   # Counts with near-duplicate titles counted once
+TERMS_BASE = 'cleaned_terms'
+SEARCH_INDEX_DIR = 'search_index'
+SNAPSHOT_DIR = 'dashboard_snapshot'   # Memory-mapped copy the dashboard reads (snapshot.py)
+PARQUET_FILE = CLEANED_BASE + '.parquet'
+CSV_FILE = CLEANED_BASE + '.csv'
+
+# Low-cardinality text columns that are stored once per value
+CATEGORY_COLUMNS = ['journal', 'source_x', 'source']
+# Integer columns of the aggregate tables (everything else is stored as text)
+COUNT_COLUMNS = ['count', 'error']
+# Integer columns added to the cleaned data after it was written
+INT_COLUMNS = ['cluster_id']
+# Columns the dashboard actually uses (cluster_id only exists after analysis.py --dedup)
+DASHBOARD_COLUMNS = ['title', 'journal', 'source_x', 'source', 'year', 'cluster_id']
+
+
+def default_format():
+    return 'parquet' if pq is not None else 'csv'
+
+
+def default_path(fmt):
+    return PARQUET_FILE if fmt == 'parquet' else CSV_FILE
+
+
+def compact(df):
+    """Cast cleaned columns to small, typed dtypes (in place)"""
+    if 'year' in df.columns:
+        df['year'] = df['year'].astype('int16')
+    if 'publish_time' in df.columns:
+        df['publish_time'] = pd.to_datetime(df['publish_time'])
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def _arrow_schema(df):
+    """Fixed schema for every chunk: text columns as strings, plus typed year/publish_time/counts"""
+    fields = []
+    for col in df.columns:
+        if col == 'year':
+            fields.append(pa.field(col, pa.int16()))
+        elif col == 'publish_time':
+            fields.append(pa.field(col, pa.timestamp('ns')))
+        elif col in COUNT_COLUMNS or col in INT_COLUMNS:
+            fields.append(pa.field(col, pa.int64()))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    return pa.schema(fields)
+
+
+class CleanedWriter:
+    """Write cleaned chunks to Parquet, or CSV when pyarrow is missing
+
+    Output goes to a temporary file that is renamed into place on close(),
+    so the dashboard never sees a half-written file. With append=True the
+    rows are added to an existing store instead, as a new delta file next to
+    it (cleaned_metadata.delta-NNNNN.parquet or .csv); the existing files
+    are never modified.
+    """
+
+    def __init__(self, path=None, fmt=None, append=False):
+        self.fmt = fmt or default_format()
+        if self.fmt == 'parquet' and pq is None:
+            raise RuntimeError("Writing Parquet requires pyarrow (pip install pyarrow)")
+        self.path = path or default_path(self.fmt)
+        self.append = append and os.path.exists(self.path)
+        self.tmp_path = (next_delta_file(self.path) if self.append else self.path) + '.tmp'
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+
+    def write(self, df):
+        if self.fmt == 'csv':
+            first = self.rows == 0
+            df.to_csv(self.tmp_path, mode='w' if first else 'a', header=first, index=False)
+        else:
+            if self._writer is None:
+                self._schema = _arrow_schema(df)
+                self._writer = pq.ParquetWriter(self.tmp_path, self._schema)
+            df = df.copy()
+            for field in self._schema:
+                if field.type == pa.string():
+                    df[field.name] = df[field.name].astype('string')
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            self._writer.write_table(table)
+        self.rows += len(df)
+
+    def append_part(self, part_path, rows):
+        """Copy a file written by another CleanedWriter (same format) onto the end of this one"""
+        if not os.path.exists(part_path):
+            return
+        if self.fmt == 'csv':
+            first = self.rows == 0
+            with open(part_path, 'rb') as src, open(self.tmp_path, 'wb' if first else 'ab') as dst:
+                header = src.readline()
+                if first:
+                    dst.write(header)
+                shutil.copyfileobj(src, dst)
+        else:
+            part = pq.ParquetFile(part_path)
+            if self._writer is None:
+                self._schema = part.schema_arrow
+                self._writer = pq.ParquetWriter(self.tmp_path, self._schema)
+            for i in range(part.num_row_groups):
+                self._writer.write_table(part.read_row_group(i))
+        self.rows += rows
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self.append:
+            if os.path.exists(self.tmp_path):
+                os.replace(self.tmp_path, self.tmp_path[:-len('.tmp')])
+        elif os.path.exists(self.tmp_path):
+            os.replace(self.tmp_path, self.path)
+            # A full rewrite supersedes any deltas appended to the old file
+            for delta in delta_files(self.path):
+                os.remove(delta)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            if self._writer is not None:
+                self._writer.close()
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+
+
+def delta_files(path):
+    """Files appended after path was written, oldest first"""
+    stem, ext = os.path.splitext(path)
+    return sorted(glob.glob(f'{glob.escape(stem)}.delta-*{ext}'))
+
+
+def next_delta_file(path):
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.delta-{len(delta_files(path)) + 1:05d}{ext}'
+
+
+def find_file(base, folder='.'):
+    """Return base.parquet or base.csv, whichever exists (Parquet unless the CSV is newer)"""
+    parquet_path = os.path.join(folder, base + '.parquet')
+    csv_path = os.path.join(folder, base + '.csv')
+    have_parquet = pq is not None and os.path.exists(parquet_path)
+    if have_parquet and not (os.path.exists(csv_path)
+                             and os.path.getmtime(csv_path) > os.path.getmtime(parquet_path)):
+        return parquet_path
+    if os.path.exists(csv_path):
+        return csv_path
+    raise FileNotFoundError(f"No {base} data found. Run 'python analysis.py' first.")
+
+
+def cleaned_file(folder='.'):
+    """Return the cleaned data file to read"""
+    return find_file(CLEANED_BASE, folder)
+
+
+def cleaned_parts(folder='.'):
+    """The cleaned data file followed by its delta files, in row order"""
+    path = cleaned_file(folder)
+    return [path] + delta_files(path)
+
+
+def save_table(df, base, fmt=None, folder='.'):
+    """Write a small table (e.g. aggregates) in one go next to the cleaned data"""
+    fmt = fmt or default_format()
+    with CleanedWriter(os.path.join(folder, base + '.' + fmt), fmt) as writer:
+        writer.write(df)
+    return writer.path
+
+
+def load_table(base, folder='.'):
+    path = find_file(base, folder)
+    if path.endswith('.parquet'):
+        return pq.read_table(path, memory_map=True).to_pandas()
+    return pd.read_csv(path, keep_default_na=False)
+
+
+def load_cleaned(columns=None, folder='.'):
+    """Load the cleaned data, reading only `columns` (those missing from the file are ignored)"""
+    parts = cleaned_parts(folder)
+    if parts[0].endswith('.parquet'):
+        names = pq.read_schema(parts[0]).names
+        columns = [c for c in columns if c in names] if columns else names
+        tables = [pq.read_table(part, columns=columns, memory_map=True,
+                                read_dictionary=[c for c in columns if c in CATEGORY_COLUMNS])
+                  for part in parts]
+        df = pa.concat_tables(tables).to_pandas()
+    else:
+        usecols = (lambda c: c in columns) if columns else None
+        df = pd.concat([pd.read_csv(part, usecols=usecols) for part in parts], ignore_index=True)
+    return compact(df)
+
+
+def add_column(name, values, folder='.', batch_rows=100000):
+    """Add (or replace) a column of the cleaned data; values has one entry per row, in iter_cleaned() order
+
+    Every file (deltas included) is rewritten to a temporary file that is
+    renamed into place, one batch at a time.
+    """
+    start = 0
+    for part in cleaned_parts(folder):
+        if part.endswith('.parquet'):
+            parquet = pq.ParquetFile(part)
+            names = [c for c in parquet.schema_arrow.names if c != name]
+            arrow_schema = parquet.schema_arrow.remove(parquet.schema_arrow.get_field_index(name)) \
+                if name in parquet.schema_arrow.names else parquet.schema_arrow
+            field = pa.field(name, pa.int64() if name in INT_COLUMNS else pa.string())
+            with pq.ParquetWriter(part + '.tmp', arrow_schema.append(field)) as writer:
+                for batch in parquet.iter_batches(batch_size=batch_rows, columns=names):
+                    column = pa.array(values[start:start + batch.num_rows], type=field.type)
+                    writer.write_table(pa.Table.from_batches([batch]).append_column(field, column))
+                    start += batch.num_rows
+            parquet.close()
+            os.replace(part + '.tmp', part)
+        else:
+            first = True
+            for chunk in pd.read_csv(part, dtype=str, keep_default_na=False, chunksize=batch_rows):
+                chunk[name] = values[start:start + len(chunk)]
+                chunk.to_csv(part + '.tmp', mode='w' if first else 'a', header=first, index=False)
+                start += len(chunk)
+                first = False
+            if not first:
+                os.replace(part + '.tmp', part)
+    if start != len(values):
+        raise ValueError(f"{name} has {len(values)} values for {start} rows")
+
+
+def iter_cleaned(columns=None, batch_rows=100000, folder='.'):
+    """Yield the cleaned data in order, batch_rows rows at a time, reading only `columns`"""
+    for part in cleaned_parts(folder):
+        if part.endswith('.parquet'):
+            parquet = pq.ParquetFile(part, memory_map=True)
+            names = parquet.schema_arrow.names
+            wanted = [c for c in columns if c in names] if columns else names
+            for batch in parquet.iter_batches(batch_size=batch_rows, columns=wanted):
+                yield compact(batch.to_pandas())
+        else:
+            usecols = (lambda c: c in columns) if columns else None
+            for chunk in pd.read_csv(part, usecols=usecols, chunksize=batch_rows):
+                yield compact(chunk)
@@ -1,7 +1,18 @@
+import os
+import time
+
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+import charts
+import cube
+import schema
+import search_index
+import snapshot
+import terms
+
+SEARCH_PAGE_SIZE = 10
+# Optional cap on the size of the mapped rows, e.g. CORD19_MEMORY_BUDGET_MB=2000 streamlit run streamlit_app.py
+MEMORY_BUDGET_MB = float(os.environ['CORD19_MEMORY_BUDGET_MB']) if os.environ.get('CORD19_MEMORY_BUDGET_MB') else None
 
 # Page config
 st.set_page_config(page_title="CORD-19 Analysis", layout="wide")
@@ -10,47 +21,140 @@ st.set_page_config(page_title="CORD-19 Analysis", layout="wide")
 st.title("CORD-19 Research Dataset Insights")
 st.markdown("A simple analysis of COVID-19 publications from the metadata.csv file.")
 
-# Load data
-@st.cache_data
-def load_data():
-    return pd.read_csv('cleaned_metadata.csv')
+# The snapshot analysis.py publishes: memory-mapped, so every session and server process
+# reads the same pages and nothing is copied or pickled per session. Each cached object
+# below is keyed by the snapshot version; a new version replaces it on the next rerun.
+@st.cache_resource(max_entries=1)
+def open_snapshot(version):
+    return snapshot.Snapshot(version=version)
+
+# Aggregate counts are turned into cubes once per process and version, not per rerun
+@st.cache_resource(max_entries=1)
+def load_cubes(version):
+    snap = open_snapshot(version)
+    counts = snap.table('aggregates')
+    # Counts with near-duplicate titles counted once (written by analysis.py --dedup)
+    dedup_counts = snap.table('aggregates_dedup')
+    dedup_cube = cube.YearCube(dedup_counts, 'journal') if dedup_counts is not None else None
+    return cube.YearCube(counts, 'journal'), cube.YearCube(counts, 'source'), dedup_cube
 
-df = load_data()
+# Rendered charts shared by every session; common year ranges are drawn at startup
+@st.cache_resource(max_entries=1)
+def load_chart_cache(version):
+    journal_cube, _, dedup_cube = load_cubes(version)
+    # Per-year title term counts written by analysis.py
+    term_table = open_snapshot(version).table('terms')
+    renderers = {
+        'year': lambda lo, hi: charts.render_year_chart(journal_cube, lo, hi),
+        'journals': lambda lo, hi: charts.render_journal_chart(journal_cube, lo, hi),
+    }
+    if dedup_cube is not None:
+        renderers['year_dedup'] = lambda lo, hi: charts.render_year_chart(dedup_cube, lo, hi)
+        renderers['journals_dedup'] = lambda lo, hi: charts.render_journal_chart(dedup_cube, lo, hi)
+    if term_table is not None:
+        renderers['wordcloud'] = lambda lo, hi: charts.render_wordcloud(terms.frequencies(term_table, lo, hi))
+    cache = charts.ChartCache(renderers)
+    ranges = charts.common_ranges(journal_cube.first_year, journal_cube.last_year)
+    cache.warm(ranges[:1])  # The default view, before the first page is served
+    cache.warm_in_background(ranges[1:])
+    return cache
+
+# Memory-mapped search index; pages are read from disk as queries touch them.
+# Only the index built for this snapshot is used: the snapshot records its build id.
+@st.cache_resource(max_entries=1)
+def load_search_index(version):
+    build = open_snapshot(version).search_index
+    if build is None:
+        return None
+    try:
+        index = search_index.SearchIndex()
+    except FileNotFoundError:
+        return None
+    # Rebuilt by a run that hasn't published its snapshot yet: its doc ids are rows of other data
+    return index if index.meta.get('build') == build else None
+
+# Reading the CURRENT file is the only per-rerun cost of noticing new analysis.py output
+version = snapshot.current_version()
+try:
+    snap = open_snapshot(version)
+except FileNotFoundError as e:
+    st.error(f"{e} (Output of an older run can be published with 'python snapshot.py'.)")
+    st.stop()
+try:
+    # The mapped files live in the shared page cache, so this bounds the host, not each process
+    schema.check_budget(snap.rows.memory_report(), MEMORY_BUDGET_MB, f"Mapping {len(snap.rows):,} rows")
+except schema.MemoryBudgetError as e:
+    st.error(f"{e}. Raise CORD19_MEMORY_BUDGET_MB or load fewer rows.")
+    st.dataframe(e.report)
+    st.stop()
+journal_cube, source_cube, dedup_cube = load_cubes(version)
+chart_cache = load_chart_cache(version)
+index = load_search_index(version)
 
 # Sidebar for filters
 st.sidebar.header("Filters")
-min_year = st.sidebar.slider("Min Year", df['year'].min(), df['year'].max(), df['year'].min())
-max_year = st.sidebar.slider("Max Year", min_year, df['year'].max(), df['year'].max())
-filtered_df = df[(df['year'] >= min_year) & (df['year'] <= max_year)]
+first_year, last_year = journal_cube.first_year, journal_cube.last_year
+min_year = st.sidebar.slider("Min Year", first_year, last_year, first_year)
+max_year = st.sidebar.slider("Max Year", min_year, last_year, last_year)
+# Preprints and their published versions counted once; only after analysis.py --dedup
+deduplicated = (dedup_cube is not None and snap.year_index(deduplicated=True) is not None
+                and st.sidebar.toggle("Deduplicated counts", help="Count near-duplicate titles once"))
+counts_cube = dedup_cube if deduplicated else journal_cube
+chart_suffix = '_dedup' if deduplicated else ''
+# Rows sorted by year (only each cluster's first row when deduplicated), precomputed in the snapshot
+year_index = snap.year_index(deduplicated)
 
 # Key Metrics
 col1, col2, col3 = st.columns(3)
-col1.metric("Total Publications", len(df))
-col2.metric("Publications in Range", len(filtered_df))
+col1.metric("Total Publications", len(year_index.order))
+col2.metric("Publications in Range", counts_cube.total(min_year, max_year))
 col3.metric("Year Range", f"{min_year}–{max_year}")
 
 # Publications by Year Plot
 st.subheader("Publications by Year")
-fig, ax = plt.subplots(figsize=(10, 5))
-year_counts = filtered_df['year'].value_counts().sort_index()
-ax.bar(year_counts.index, year_counts.values, color='skyblue')
-ax.set_title('Publications by Year (Filtered)')
-ax.set_xlabel('Year')
-ax.set_ylabel('Count')
-st.pyplot(fig)
+st.image(chart_cache.get('year' + chart_suffix, min_year, max_year))
 
 # Top Journals Plot
 st.subheader("Top 10 Journals")
-fig2, ax2 = plt.subplots(figsize=(10, 6))
-top_journals = filtered_df['journal'].value_counts().head(10)
-sns.barplot(x=top_journals.values, y=top_journals.index, ax=ax2, palette='viridis')
-ax2.set_title('Top 10 Journals by Publication Count (Filtered)')
-ax2.set_xlabel('Count')
-st.pyplot(fig2)
+st.image(chart_cache.get('journals' + chart_suffix, min_year, max_year))
+
+# Word Cloud of Titles (summed from precomputed per-year counts)
+st.subheader("Title Word Cloud")
+if 'wordcloud' not in chart_cache.renderers:
+    st.info("Run 'python analysis.py' again to enable the word cloud.")
+else:
+    wordcloud_image = chart_cache.get('wordcloud', min_year, max_year)
+    if wordcloud_image:
+        st.image(wordcloud_image, use_container_width=True)
+    else:
+        st.info("No titles in this year range.")
 
 # Sample Titles Table
 st.subheader("Sample Paper Titles")
-st.dataframe(filtered_df[['title', 'journal', 'year']].head(10), use_container_width=True)
+sample_rows = year_index.rows(min_year, max_year, limit=10)
+st.dataframe(snap.rows.take(sample_rows, ['title', 'journal', 'year']), use_container_width=True)
+
+# Search titles and abstracts within the year range
+st.subheader("Search Papers")
+if index is None:
+    st.info("Run 'python analysis.py' again to enable search.")
+else:
+    query = st.text_input("Search titles and abstracts", placeholder="e.g. spike protein antibody")
+    if query.strip():
+        # A new query or year range starts again at the first page
+        if st.session_state.get('search_key') != (query, min_year, max_year):
+            st.session_state['search_key'] = (query, min_year, max_year)
+            st.session_state['search_page'] = 1
+        page = st.session_state.get('search_page', 1)
+        started = time.perf_counter()
+        doc_ids, scores, total_hits = index.search(query, min_year, max_year, page, SEARCH_PAGE_SIZE)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        pages = max(1, -(-total_hits // SEARCH_PAGE_SIZE))
+        st.caption(f"{total_hits} matching papers in {elapsed_ms:.0f} ms (page {page} of {pages})")
+        if total_hits:
+            results = snap.rows.take(doc_ids, ['title', 'journal', 'year']).assign(score=scores.round(2))
+            st.dataframe(results, use_container_width=True)
+            st.number_input("Page", min_value=1, max_value=pages, step=1, key='search_page')
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,155 @@
+# synthetic_metadata.py: Generate realistic fake CORD-19 metadata.csv files for benchmarking
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# The real metadata.csv column set, in order
+COLUMNS = ['cord_uid', 'sha', 'source_x', 'title', 'doi', 'pmcid', 'pubmed_id', 'license',
+           'abstract', 'publish_time', 'authors', 'journal', 'mag_id', 'who_covidence_id',
+           'arxiv_id', 'pdf_json_files', 'pmc_json_files', 'url', 's2_id']
+
+# Sources and their share of rows; the real file is ordered by source
+SOURCES = {'PMC': 0.25, 'Medline': 0.30, 'WHO': 0.20, 'Elsevier': 0.12, 'MedRxiv': 0.06,
+           'ArXiv': 0.04, 'BioRxiv': 0.03}
+YEARS = np.arange(1970, 2023)
+REAL_JOURNALS = ['PLoS One', 'bioRxiv', 'BMJ', 'Sci Rep', 'Lancet', 'Nature', 'Virol J',
+                 'J Virol', 'Int J Environ Res Public Health', 'Cureus', 'medRxiv', 'Viruses']
+WORDS = ('covid sars coronavirus cov viral virus infection respiratory clinical patients study '
+         'analysis protein vaccine pandemic outbreak transmission severe acute syndrome '
+         'disease health care public model response immune cell human novel mers influenza '
+         'pneumonia case cases review risk factors treatment hospital mortality children '
+         'china wuhan spike receptor binding antibody rna genome sequence epidemic control '
+         'lung cytokine therapy trial mental social distancing lockdown testing detection').split()
+FREE_TEXT_DATES = ['2020 Mar 5', 'Spring 2020', '2019 Dec', 'March 2021', 'n.d.', '2020-03', 'Jul-Aug 2020']
+LICENSES = ['cc-by', 'cc-by-nc', 'no-cc', 'els-covid', 'medrxiv', 'biorxiv', 'arxiv', 'unk']
+
+
+def parse_size(text):
+    """'10k' -> 10000, '1M' -> 1000000"""
+    text = str(text).strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+def size_label(rows):
+    for scale, suffix in ((1_000_000, 'M'), (1_000, 'k')):
+        if rows >= scale and rows % scale == 0:
+            return f'{rows // scale}{suffix}'
+    return str(rows)
+
+
+def _zipf_choice(rng, n, size, a=1.3):
+    """Indices in [0, size) with a heavy-headed, long-tailed distribution"""
+    return (rng.zipf(a, n) - 1) % size
+
+
+def _sentences(rng, n, low, high):
+    """n strings of low..high words drawn with a Zipf-like word distribution"""
+    lengths = rng.integers(low, high + 1, n)
+    words = np.array(WORDS, dtype=object)[_zipf_choice(rng, n * high, len(WORDS), a=1.2).reshape(n, high)]
+    columns = [pd.Series(words[:, i]) for i in range(high)]
+    # Blank out the words past each row's length, then join the rest
+    for i in range(low, high):
+        columns[i] = columns[i].where(lengths > i, '')
+    text = columns[0].str.cat(columns[1:], sep=' ')
+    return text.str.rstrip().str.replace(r' {2,}', ' ', regex=True)
+
+
+def _publish_times(rng, n):
+    years = rng.choice(YEARS, n, p=_year_weights())
+    months = rng.integers(1, 13, n)
+    days = rng.integers(1, 29, n)
+    kind = rng.choice(4, n, p=[0.45, 0.35, 0.05, 0.15])  # date, year, free text, missing
+    year_text = pd.Series(years).astype(str)
+    full = year_text + '-' + pd.Series(months).map('{:02d}'.format) + '-' + pd.Series(days).map('{:02d}'.format)
+    free = pd.Series(np.array(FREE_TEXT_DATES, dtype=object)[rng.integers(0, len(FREE_TEXT_DATES), n)])
+    result = full.where(kind == 0, year_text).where(kind != 2, free)
+    return result.where(kind != 3, None)
+
+
+def _year_weights():
+    # Slow growth up to 2019, then the COVID-19 spike
+    weights = np.where(YEARS < 2020, np.linspace(0.1, 1.0, len(YEARS)), 0.0)
+    weights[YEARS == 2020] = 25
+    weights[YEARS == 2021] = 30
+    weights[YEARS == 2022] = 8
+    return weights / weights.sum()
+
+
+def _journals(rng, n, n_journals):
+    names = np.array(REAL_JOURNALS + [f'J Synthetic Res {i}' for i in range(n_journals)], dtype=object)
+    journals = pd.Series(names[_zipf_choice(rng, n, len(names), a=1.1)])
+    return journals.where(rng.random(n) > 0.10, None)
+
+
+def _missing(series, rng, rate):
+    return series.where(rng.random(len(series)) > rate, None)
+
+
+def generate_block(rng, n, source, first_id, n_journals=5000):
+    """One DataFrame of n synthetic rows from a single source"""
+    ids = pd.Series(np.arange(first_id, first_id + n))
+    title = _missing(_sentences(rng, n, 5, 14), rng, 0.03)
+    df = pd.DataFrame({
+        'cord_uid': ids.map('{:08x}'.format),
+        'sha': _missing(ids.map('{:040x}'.format), rng, 0.6),
+        'source_x': source,
+        'title': title,
+        'doi': _missing('10.1000/synthetic.' + ids.astype(str), rng, 0.3),
+        'pmcid': _missing('PMC' + ids.astype(str), rng, 0.5),
+        'pubmed_id': _missing(pd.Series(rng.integers(1, 35_000_000, n)).astype(str), rng, 0.4),
+        'license': np.array(LICENSES, dtype=object)[rng.integers(0, len(LICENSES), n)],
+        'abstract': _missing(_sentences(rng, n, 20, 40), rng, 0.2),
+        'publish_time': _publish_times(rng, n),
+        'authors': _missing(pd.Series(rng.integers(0, 100_000, n)).map('Author{}, A.; Coauthor, B.'.format), rng, 0.05),
+        'journal': _journals(rng, n, n_journals),
+        'mag_id': None,
+        'who_covidence_id': _missing('#' + ids.astype(str), rng, 0.8),
+        'arxiv_id': None,
+        'pdf_json_files': _missing('document_parses/pdf_json/' + ids.map('{:040x}'.format) + '.json', rng, 0.6),
+        'pmc_json_files': _missing('document_parses/pmc_json/PMC' + ids.astype(str) + '.xml.json', rng, 0.7),
+        'url': _missing('https://doi.org/10.1000/synthetic.' + ids.astype(str), rng, 0.3),
+        's2_id': _missing(pd.Series(rng.integers(1, 230_000_000, n)).astype(str), rng, 0.1),
+    })
+    return df[COLUMNS]
+
+
+def write_metadata(path, rows, seed=0, block_size=100_000):
+    """Write a synthetic metadata.csv with `rows` rows, grouped by source like the real file"""
+    rng = np.random.default_rng(seed)
+    per_source = rng.multinomial(rows, list(SOURCES.values()))
+    tmp_path = path + '.tmp'
+    first_id = 0
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        f.write(','.join(COLUMNS) + '\n')
+        for source, count in zip(SOURCES, per_source):
+            while count > 0:
+                n = min(block_size, count)
+                generate_block(rng, n, source, first_id).to_csv(f, header=False, index=False)
+                first_id += n
+                count -= n
+    os.replace(tmp_path, path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic CORD-19 metadata.csv files")
+    parser.add_argument('--rows', nargs='+', default=['10k', '100k', '1M', '10M'],
+                        help="sizes to generate, e.g. 10k 100k 1M 10M")
+    parser.add_argument('--out-dir', default='synthetic', help="folder for the generated files")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for size in args.rows:
+        rows = parse_size(size)
+        path = os.path.join(args.out_dir, f'metadata_{size_label(rows)}.csv')
+        print(f"Writing {rows} rows to {path}...")
+        write_metadata(path, rows, seed=args.seed)
+    print("Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# terms.py: Streaming per-year title term counts for the word cloud
+from collections import Counter
+
+import pandas as pd
+from wordcloud import STOPWORDS
+
+import sketches
+import store
+
+TOKEN_PATTERN = r"\w[\w']+"   # Same tokens WordCloud itself uses
+TERM_ERROR = 0.0001           # Each year keeps at most 9,999 terms
+
+
+def year_terms(clean):
+    """Count lower-cased title words per (year, term), skipping stopwords and plain numbers
+
+    Every title is tokenized on its own, so the counts add up the same way
+    however the rows are split into chunks or partitions.
+    """
+    words = pd.DataFrame({
+        'year': clean['year'].to_numpy(),
+        'term': clean['title'].astype(str).str.lower().str.findall(TOKEN_PATTERN).to_numpy(),
+    }).explode('term').dropna(subset=['term'])
+    words = words[~words['term'].isin(STOPWORDS) & ~words['term'].str.isdigit()]
+    return words.groupby(['year', 'term']).size()
+
+
+class TermCounts:
+    """Title term counts per year, one fixed-size heavy-hitter sketch per year
+
+    Each year keeps at most ceil(1 / error) - 1 terms however large the
+    vocabulary grows, so the counts held in memory, sent back from
+    partition workers and saved in the --incremental state stay bounded.
+    Kept counts are lower bounds, short by at most that year's error bound;
+    a dropped term occurred at most that often. Chunks and partitions can
+    leave different terms in the tail, but always within those bounds.
+    """
+
+    def __init__(self, error=TERM_ERROR):
+        self.error = error
+        self.sketches = sketches.YearHeavyHitters(error)
+
+    def update(self, clean):
+        self.sketches.add_pair_counts(year_terms(clean))
+
+    def merge(self, other):
+        self.sketches.merge(other.sketches)
+
+    def totals(self, min_year=None, max_year=None):
+        """Term -> count summed over the years in range (all years by default)"""
+        totals = Counter()
+        for year, sketch in self.sketches.years.items():
+            if (min_year is None or year >= min_year) and (max_year is None or year <= max_year):
+                totals.update(sketch.counts.to_dict())
+        return totals
+
+    def year_errors(self):
+        """{year: largest amount that year's term counts can be short by}"""
+        return self.sketches.year_errors()
+
+    def error_bound(self):
+        """Largest amount a term count summed over all years can be short by"""
+        return self.sketches.error_bound()
+
+    def frame(self):
+        """Long table with one row per kept (year, term) and its year's error bound"""
+        rows = sorted(((year, term, count) for (year, term), count in self.sketches.pair_counts().items()),
+                      key=lambda row: (row[0], row[1]))
+        df = pd.DataFrame(rows, columns=['year', 'term', 'count'])
+        errors = self.year_errors()
+        df['error'] = [errors[year] for year in df['year']]
+        df['year'] = df['year'].astype('int16')
+        df['count'] = df['count'].astype('int64')
+        df['error'] = df['error'].astype('int64')
+        return df
+
+    def to_state(self):
+        return self.sketches.to_state()
+
+    @classmethod
+    def from_state(cls, state):
+        terms = cls(state['error'])
+        terms.sketches = sketches.YearHeavyHitters.from_state(state)
+        return terms
+
+
+def save(term_counts, fmt=None, folder='.'):
+    return store.save_table(term_counts.frame(), store.TERMS_BASE, fmt, folder)
+
+
+def load(folder='.'):
+    return store.load_table(store.TERMS_BASE, folder)
+
+
+def frequencies(table, min_year, max_year):
+    """Term -> count for a year range, summed from a saved term table"""
+    in_range = table[(table['year'] >= min_year) & (table['year'] <= max_year)]
+    return in_range.groupby('term')['count'].sum().to_dict()
@@ -1,25 +1,166 @@
-# Prompt user for input
-num1 = float(input("Enter the first number: "))
-num2 = float(input("Enter the second number: "))
-operation = input("Enter the operation (+, -, *, /): ")
-
-# Perform the requested operation
-if operation == "+":
-    result = num1 + num2
-elif operation == "-":
-    result = num1 - num2
-elif operation == "*":
-    result = num1 * num2
-elif operation == "/":
-    # Check for division by zero
-    if num2 != 0:
-        result = num1 / num2
+import argparse
+import itertools
+import sys
+
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = 1_000_000  # Records evaluated at a time in bulk mode
+
+# Operators supported in bulk mode, each applied to a whole group of records at once
+OPERATIONS = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": np.divide}
+INVALID_INPUT = "Error: Invalid input, expected 'num1 operation num2'."
+
+
+def interactive():
+    # Prompt user for input
+    num1 = float(input("Enter the first number: "))
+    num2 = float(input("Enter the second number: "))
+    operation = input("Enter the operation (+, -, *, /): ")
+
+    # Perform the requested operation
+    if operation == "+":
+        result = num1 + num2
+    elif operation == "-":
+        result = num1 - num2
+    elif operation == "*":
+        result = num1 * num2
+    elif operation == "/":
+        # Check for division by zero
+        if num2 != 0:
+            result = num1 / num2
+        else:
+            print("Error: Division by zero is not allowed.")
+            exit()
     else:
-        print("Error: Division by zero is not allowed.")
+        print("Error: Invalid operation.")
         exit()
-else:
-    print("Error: Invalid operation.")
-    exit()
 
-# Display the result
-print(f"{num1} {operation} {num2} = {result}")
\ No newline at end of file
+    # Display the result
+    print(f"{num1} {operation} {num2} = {result}")
+
+
+def _to_float(text):
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+
+def parse_numbers(column):
+    """A num1/num2 column of text as floats, parsed exactly like float() (NaN where it isn't a number)"""
+    text = column.to_numpy(dtype=object)
+    try:
+        return text.astype(float)  # float() on every value, in one C loop
+    except ValueError:  # Some values aren't numbers: parse this chunk value by value
+        return np.array([_to_float(value) for value in text], dtype=float)
+
+
+def split_records(lines):
+    """Split lines into num1/operation/num2 fields, like str.split(); blank lines are dropped
+
+    Returns (records, malformed, well_formed): records is a DataFrame with
+    the fields of the lines that have exactly three, malformed holds the
+    other lines (fields joined by single spaces), and well_formed marks,
+    for every non-blank line in order, whether it is a record.
+    """
+    fields = [line.split() for line in lines]
+    counts = np.fromiter(map(len, fields), dtype=np.int64, count=len(fields))
+    counts = counts[counts > 0]
+    well_formed = counts == 3
+    records = np.array([f for f in fields if len(f) == 3], dtype=object).reshape(-1, 3)
+    malformed = np.array([" ".join(f) for f in fields if len(f) not in (0, 3)], dtype=object)
+    return pd.DataFrame(records, columns=["num1", "operation", "num2"]), malformed, well_formed
+
+
+def evaluate(num1, operation, num2):
+    """Evaluate arrays of records
+
+    Returns (result, error): result is NaN and error holds the message for
+    rows that can't be evaluated, so one bad row never stops the rest.
+    """
+    result = np.full(len(num1), np.nan)
+    error = np.full(len(num1), None, dtype=object)
+
+    # Check for division by zero and operators we don't know before doing any math
+    bad_number = np.isnan(num1) | np.isnan(num2)
+    error[bad_number] = "Error: Invalid number."
+    division_by_zero = (operation == "/") & (num2 == 0) & ~bad_number
+    error[division_by_zero] = "Error: Division by zero is not allowed."
+    unknown = ~np.isin(operation, list(OPERATIONS)) & ~bad_number
+    error[unknown] = "Error: Invalid operation."
+
+    # One vectorized call per operator instead of one branch per record
+    valid = ~(bad_number | division_by_zero | unknown)
+    with np.errstate(over="ignore", invalid="ignore"):  # inf and nan, like Python floats
+        for symbol, func in OPERATIONS.items():
+            group = valid & (operation == symbol)
+            if group.any():
+                result[group] = func(num1[group], num2[group])
+    return result, error
+
+
+def _number_text(column, values):
+    """Numbers printed like Python's f"{x}"; anything that isn't a number is echoed as typed"""
+    text = values.astype(str).astype(object)
+    bad = np.isnan(values)
+    if bad.any():
+        raw = column.to_numpy(dtype=object)[bad]
+        text[bad] = np.where(pd.isna(raw), "", raw)
+    return text
+
+
+def format_results(records, num1, num2, result, error):
+    """One output line per record, in input order, so bulk lines match the interactive ones"""
+    left = _number_text(records["num1"], num1)
+    right = _number_text(records["num2"], num2)
+    operation = records["operation"].fillna("").to_numpy(dtype=object)
+    answer = np.where(pd.isna(error), result.astype(str).astype(object), error)
+    return left + " " + operation + " " + right + " = " + answer
+
+
+def bulk(source, out=sys.stdout, chunk_size=CHUNK_SIZE):
+    """Evaluate 'num1 operation num2' records (one per line, '-' for stdin); returns (records, errors)
+
+    A line without exactly three fields gets an error line of its own
+    instead of stopping the run.
+    """
+    f = sys.stdin if source == "-" else open(source)
+    total = errors = 0
+    try:
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                break
+            records, malformed, well_formed = split_records(lines)
+            if not len(well_formed):
+                continue
+            output = np.empty(len(well_formed), dtype=object)
+            output[~well_formed] = malformed + " = " + INVALID_INPUT
+            if len(records):
+                num1 = parse_numbers(records["num1"])
+                num2 = parse_numbers(records["num2"])
+                operation = records["operation"].to_numpy(dtype=object)
+                result, error = evaluate(num1, operation, num2)
+                output[well_formed] = format_results(records, num1, num2, result, error)
+                errors += int(pd.notna(error).sum())
+            out.write("\n".join(output) + "\n")
+            total += len(well_formed)
+            errors += int((~well_formed).sum())
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return total, errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Basic calculator")
+    parser.add_argument("--file", help="evaluate 'num1 operation num2' records from this file ('-' reads stdin)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="records evaluated at a time")
+    args = parser.parse_args()
+
+    if args.file:
+        total, errors = bulk(args.file, chunk_size=args.chunk_size)
+        print(f"{total} records evaluated, {errors} errors.", file=sys.stderr)
+    else:
+        interactive()
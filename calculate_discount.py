@@ -1,10 +1,19 @@
 #  Magical Discount Calculator 
 # This script sprinkles some discount magic on your shopping!
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+DISCOUNT_THRESHOLD = 20     # Discounts below this percentage are not applied
+DEFAULT_CHUNKSIZE = 1_000_000
 
 #  Function to calculate the final price after discount
 def calculate_discount(price, discount_percent):
-    # 🧙 Check if the discount is worthy (20% or more)
-    if discount_percent >= 20:
+    # 🧙 Check if the discount is worthy (DISCOUNT_THRESHOLD% or more)
+    if discount_percent >= DISCOUNT_THRESHOLD:
         #  Apply the discount formula: price - (price * discount_percent / 100)
         final_price = price * (1 - discount_percent / 100)
         return final_price
@@ -12,6 +21,54 @@ def calculate_discount(price, discount_percent):
         #  No discount? Keep the original price!
         return price
 
+#  The same rule for a whole catalog at once (NumPy arrays, lists or pandas columns)
+def calculate_discount_batch(prices, discount_percents):
+    """Vectorized calculate_discount; gives exactly the same floats as the scalar version"""
+    price_values = np.asarray(prices, dtype=float)
+    discount_values = np.asarray(discount_percents, dtype=float)
+    # Same operations in the same order as calculate_discount, so results match bit for bit
+    final = np.where(discount_values >= DISCOUNT_THRESHOLD,
+                     price_values * (1 - discount_values / 100), price_values)
+    if isinstance(prices, pd.Series):
+        return pd.Series(final, index=prices.index, name="final_price")
+    return final
+
+#  Stream a price CSV through the batch rule, one chunk at a time
+def discount_csv(source, destination, price_column="price", discount_column="discount_percent",
+                 chunksize=DEFAULT_CHUNKSIZE):
+    """Add a final_price column to every row of source; '-' means stdin/stdout. Returns rows written"""
+    reader = pd.read_csv(sys.stdin if source == "-" else source, chunksize=chunksize)
+    out = sys.stdout if destination == "-" else open(destination, "w", newline="")
+    rows = 0
+    try:
+        for chunk in reader:
+            chunk["final_price"] = calculate_discount_batch(chunk[price_column], chunk[discount_column])
+            chunk.to_csv(out, header=rows == 0, index=False)
+            rows += len(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return rows
+
+#  Race the scalar function against the batch one
+def benchmark(sizes=(1_000_000, 10_000_000), seed=0):
+    rng = np.random.default_rng(seed)
+    for size in sizes:
+        prices = rng.uniform(1, 500, size).round(2)
+        discounts = rng.integers(0, 60, size).astype(float)
+
+        start = time.perf_counter()
+        scalar = [calculate_discount(p, d) for p, d in zip(prices.tolist(), discounts.tolist())]
+        scalar_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = calculate_discount_batch(prices, discounts)
+        batch_seconds = time.perf_counter() - start
+
+        same = np.array_equal(np.array(scalar), batch)
+        print(f"{size:>11,} rows: scalar {scalar_seconds:7.3f}s, batch {batch_seconds:7.3f}s "
+              f"({scalar_seconds / batch_seconds:,.0f}x faster), identical results: {same}")
+
 #  Main program to interact with the user
 def main():
     #  Ask the user for the original price
@@ -24,11 +81,31 @@ def main():
     final_price = calculate_discount(price, discount_percent)
     
     #  Display the result with flair
-    if discount_percent >= 20:
+    if discount_percent >= DISCOUNT_THRESHOLD:
         print(f"🎊 Hooray! After a {discount_percent}% discount, the final price is ${final_price:.2f}!")
     else:
         print(f" No discount applied. The final price remains ${final_price:.2f}.")
 
+#  Batch mode: python calculate_discount.py --input prices.csv --output discounted.csv
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Magical Discount Calculator")
+    parser.add_argument("--input", help="CSV of prices to discount ('-' reads stdin)")
+    parser.add_argument("--output", default="-", help="where to write the discounted CSV ('-' is stdout)")
+    parser.add_argument("--price-column", default="price")
+    parser.add_argument("--discount-column", default="discount_percent")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows read at a time")
+    parser.add_argument("--benchmark", nargs="*", type=int, metavar="ROWS",
+                        help="compare the scalar and batch paths (default: 1000000 10000000 rows)")
+    args = parser.parse_args(argv)
+
+    if args.benchmark is not None:
+        benchmark(args.benchmark or (1_000_000, 10_000_000))
+    elif args.input:
+        rows = discount_csv(args.input, args.output, args.price_column, args.discount_column, args.chunksize)
+        print(f"✨ Discounted {rows} rows.", file=sys.stderr)
+    else:
+        main()
+
 #  Run the program when the script is executed
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    cli()
@@ -9,19 +9,30 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns  # For enhanced plotting styles
 import numpy as np  # For numerical operations
+import os
+import sys
 
-# Step 2: Load the dataset using pandas from a public URL
+from stream_stats import StreamingStats  # One-pass grouped statistics (also works on huge files)
+
+# Step 2: Load the dataset using pandas from a local copy of the public CSV
 # URL for Iris CSV: https://gist.githubusercontent.com/netj/8836201/raw/iris.csv
 url = 'https://gist.githubusercontent.com/netj/8836201/raw/iris.csv'
+cache_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'iris.csv')
 
 try:
-    df = pd.read_csv(url)
+    # Download only once; later runs (and offline runs) read the local copy
+    if not os.path.exists(cache_file):
+        print(f"Downloading the dataset to {cache_file}...")
+        pd.read_csv(url).to_csv(cache_file, index=False)
+    df = pd.read_csv(cache_file)
     print("Dataset loaded successfully!")
 except FileNotFoundError:
     print("Error: File not found. Please check the URL or download the CSV locally.")
-    # Fallback: Exit or load local file; for demo, assume success
+    sys.exit(1)  # Nothing to analyze without the data
 except Exception as e:
     print(f"An error occurred while loading the data: {e}")
+    print(f"Download {url} to {cache_file} and run again.")
+    sys.exit(1)
 
 # Step 3: Display the first few rows using .head()
 print("\nFirst 5 rows of the dataset:")
@@ -35,10 +46,11 @@ print("\nMissing values:")
 print(df.isnull().sum())
 
 # Step 5: Clean the dataset - handle missing values
+stats = StreamingStats(by='Species')
+stats.update(df)
 if df.isnull().any().any():
-    # Fill numerical columns with mean
-    numerical_cols = df.select_dtypes(include=[np.number]).columns
-    df[numerical_cols] = df[numerical_cols].fillna(df[numerical_cols].mean())
+    # Fill numerical columns with mean (from the running statistics)
+    df = stats.fill_missing(df)
     print("Missing values filled with mean for numerical columns.")
 else:
     print("No missing values found. Dataset is clean.")
@@ -50,9 +62,12 @@ print(df.describe())
 
 # Step 2: Groupings - mean of sepal length by species (categorical column)
 print("\nMean sepal length by species:")
-grouped_means = df.groupby('Species')['Sepal.Length'].mean()
+grouped_means = stats.group_means()['Sepal.Length'].sort_index()
 print(grouped_means)
 
+print("\nStatistics by species (count, mean, std, min, quartiles, max):")
+print(stats.describe())
+
 # Step 3: Identify patterns/findings
 print("\nObservations and Findings:")
 print("- Dataset: 150 iris flower samples across 3 species (setosa, versicolor, virginica).")
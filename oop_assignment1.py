@@ -1,3 +1,7 @@
+import time
+
+import numpy as np
+
 # Base Class (Parent)
 class Smartwatch:
     # Constructor to initialize attributes
@@ -76,23 +80,250 @@ class FitnessSmartwatch(Smartwatch):
             print(f" Error: {e}. Please enter a valid duration.")
 
 
-# Creating Objects (Instances)
-watch1 = Smartwatch("Apple", "Watch Series 8", 1.9, 18)
-watch2 = FitnessSmartwatch("Garmin", "Forerunner 255", 1.3, 24, True, 0)
-
-# Using the Objects
-print("=== Standard Smartwatch ===")
-watch1.toggle_power()  # Turn on
-watch1.info()
-watch1.check_notifications("Messages")
-watch1.toggle_power()  # Turn off
-watch1.info()  # Should show powered-off message
-
-print("\n=== Fitness Smartwatch ===")
-watch2.toggle_power()  # Turn on
-watch2.info()
-watch2.check_notifications("Strava")
-watch2.track_workout("Running", 30)
-watch2.info()  # Show updated steps and calories
-watch2.track_workout("Cycling", -5)  # Test error handling
-watch2.toggle_power()  # Turn off
\ No newline at end of file
+# Fleet of many watches stored as a structure of arrays (one typed array per attribute)
+class SmartwatchFleet:
+    """Smartwatches and FitnessSmartwatches kept column-wise in NumPy arrays
+
+    Each operation works on many devices per call (all of them, an array of
+    indices or a boolean mask) with the same rules as the classes above, and
+    returns one summary dict instead of printing per device. Indices may be
+    negative, like fleet[i], which gives a lightweight view of a single watch;
+    out-of-range ones raise IndexError. A watch listed twice gets the
+    operation twice (toggled back, or credited with both workouts).
+    """
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.brands = []        # Distinct brand names; brand_code indexes into this
+        self.models = []        # Distinct model names; model_code indexes into this
+        self._codes = ({}, {})  # name -> code, for brands and models
+        self.brand_code = np.zeros(capacity, dtype=np.int32)
+        self.model_code = np.zeros(capacity, dtype=np.int32)
+        self.display_size = np.zeros(capacity, dtype=np.float64)
+        self.battery_life = np.zeros(capacity, dtype=np.float64)
+        self.is_on = np.zeros(capacity, dtype=bool)
+        self.is_fitness = np.zeros(capacity, dtype=bool)
+        self.heart_rate_monitor = np.zeros(capacity, dtype=bool)
+        self.step_counter = np.zeros(capacity, dtype=np.int64)
+        self.calories_burned = np.zeros(capacity, dtype=np.float64)
+
+    _COLUMNS = ("brand_code", "model_code", "display_size", "battery_life", "is_on", "is_fitness",
+                "heart_rate_monitor", "step_counter", "calories_burned")
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if not -self.size <= index < self.size:
+            raise IndexError("fleet index out of range")
+        return SmartwatchView(self, index % self.size)
+
+    def _code(self, which, names):
+        """Integer codes for an array of names, adding new names as they appear"""
+        codes, table = self._codes[which], (self.brands, self.models)[which]
+        uniques, inverse = np.unique(np.asarray(names, dtype=object).astype(str), return_inverse=True)
+        for name in uniques:
+            if name not in codes:
+                codes[name] = len(table)
+                table.append(name)
+        return np.array([codes[name] for name in uniques], dtype=np.int32)[inverse.ravel()]
+
+    def _grow(self, needed):
+        capacity = len(self.is_on)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for column in self._COLUMNS:
+            old = getattr(self, column)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, column, new)
+
+    def add_many(self, brands, models, display_sizes, battery_lives, fitness=False,
+                 heart_rate_monitor=False, step_counter=0):
+        """Add len(brands) watches (powered off, like new objects); returns their indices"""
+        n = len(brands)
+        start, end = self.size, self.size + n
+        self._grow(end)
+        self.brand_code[start:end] = self._code(0, brands)
+        self.model_code[start:end] = self._code(1, models)
+        self.display_size[start:end] = display_sizes
+        self.battery_life[start:end] = battery_lives
+        self.is_on[start:end] = False
+        self.is_fitness[start:end] = fitness
+        self.heart_rate_monitor[start:end] = heart_rate_monitor
+        self.step_counter[start:end] = step_counter
+        self.calories_burned[start:end] = 0
+        self.size = end
+        return np.arange(start, end)
+
+    def add(self, watch):
+        """Copy a Smartwatch or FitnessSmartwatch object into the fleet; returns its index"""
+        fitness = isinstance(watch, FitnessSmartwatch)
+        index = self.add_many([watch.brand], [watch.model], watch.display_size, watch.battery_life,
+                              fitness, getattr(watch, "heart_rate_monitor", False),
+                              getattr(watch, "step_counter", 0))[0]
+        self.is_on[index] = watch.is_on
+        self.calories_burned[index] = getattr(watch, "calories_burned", 0)
+        return index
+
+    def _select(self, devices):
+        """Indices for `devices` (None means the whole fleet), checked and made non-negative"""
+        if devices is None:
+            return np.arange(self.size)
+        devices = np.asarray(devices).ravel()
+        if devices.dtype == bool:
+            if len(devices) != self.size:
+                raise IndexError(f"boolean mask has {len(devices)} entries for a fleet of {self.size}")
+            return np.flatnonzero(devices)
+        if not len(devices):
+            return np.zeros(0, dtype=np.int64)
+        if not np.issubdtype(devices.dtype, np.integer):
+            raise IndexError("fleet indices must be integers or a boolean mask")
+        devices = devices.astype(np.int64)
+        if ((devices < -self.size) | (devices >= self.size)).any():
+            raise IndexError("fleet index out of range")
+        return devices % self.size
+
+    # Power on/off many watches at once
+    def toggle_power(self, devices=None):
+        devices = self._select(devices)
+        # A watch listed an even number of times ends up where it started, as with one toggle per entry
+        self.is_on[:self.size] ^= np.bincount(devices, minlength=self.size) % 2 == 1
+        now_on = int(self.is_on[devices].sum())
+        return {"toggled": len(devices), "now_on": now_on, "now_off": len(devices) - now_on}
+
+    # Check notifications on many watches; fitness watches check fitness updates
+    def check_notifications(self, app, devices=None):
+        devices = self._select(devices)
+        on = self.is_on[devices]
+        fitness = self.is_fitness[devices] & on
+        return {"app": app, "checked": int(on.sum()), "fitness_updates": int(fitness.sum()),
+                "skipped_powered_off": int((~on).sum())}
+
+    # Track the same activity on many fitness watches; durations may differ per watch
+    def track_workout(self, activity, duration_minutes, devices=None):
+        devices = self._select(devices)
+        durations = np.broadcast_to(_to_durations(duration_minutes), devices.shape)
+        fitness = self.is_fitness[devices]
+        powered_off = fitness & ~self.is_on[devices]
+        # Same rule as FitnessSmartwatch: non-positive durations (and ones that aren't numbers) are rejected
+        rejected = fitness & ~powered_off & ~(durations > 0)
+        valid = fitness & ~powered_off & ~rejected
+        tracked = devices[valid]
+        calories = durations[valid] * 10                   # 10 kcal per minute
+        steps = (durations[valid] * 100).astype(np.int64)  # 100 steps per minute, truncated like int()
+        # np.add.at so a watch listed twice gets both workouts
+        np.add.at(self.calories_burned, tracked, calories)
+        np.add.at(self.step_counter, tracked, steps)
+        return {"activity": activity, "tracked": len(tracked), "steps_added": int(steps.sum()),
+                "calories_burned": float(calories.sum()), "skipped_powered_off": int(powered_off.sum()),
+                "skipped_not_fitness": int((~fitness).sum()), "rejected_duration": int(rejected.sum())}
+
+    def summary(self):
+        """Fleet-wide totals"""
+        fitness = self.is_fitness[:self.size]
+        return {"watches": self.size, "fitness_watches": int(fitness.sum()),
+                "powered_on": int(self.is_on[:self.size].sum()),
+                "total_steps": int(self.step_counter[:self.size][fitness].sum()),
+                "total_calories": float(self.calories_burned[:self.size][fitness].sum())}
+
+
+def _to_durations(values):
+    """Durations as floats; anything float() rejects becomes NaN (and is then rejected)"""
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        def to_float(value):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return np.nan
+        return np.array([to_float(value) for value in np.ravel(values)], dtype=float)
+
+
+# One watch in a SmartwatchFleet, read and changed through the fleet's arrays
+class SmartwatchView:
+    __slots__ = ("fleet", "index")
+
+    def __init__(self, fleet, index):
+        self.fleet = fleet
+        self.index = index
+
+    brand = property(lambda self: self.fleet.brands[self.fleet.brand_code[self.index]])
+    model = property(lambda self: self.fleet.models[self.fleet.model_code[self.index]])
+    display_size = property(lambda self: float(self.fleet.display_size[self.index]))
+    battery_life = property(lambda self: float(self.fleet.battery_life[self.index]))
+    is_on = property(lambda self: bool(self.fleet.is_on[self.index]))
+    is_fitness = property(lambda self: bool(self.fleet.is_fitness[self.index]))
+    step_counter = property(lambda self: int(self.fleet.step_counter[self.index]))
+    calories_burned = property(lambda self: float(self.fleet.calories_burned[self.index]))
+
+    def toggle_power(self):
+        return self.fleet.toggle_power([self.index])
+
+    def info(self):
+        if not self.is_on:
+            print(f" {self.brand} {self.model} is powered off. Please turn it on.")
+            return
+        print(f" {self.brand} {self.model}")
+        print(f"   Display: {self.display_size} inches")
+        print(f"   Battery Life: {self.battery_life} hours")
+        if self.is_fitness:
+            print(f"   Heart Rate Monitor: {'Yes' if self.fleet.heart_rate_monitor[self.index] else 'No'}")
+            print(f"   Steps: {self.step_counter}")
+            print(f"   Calories Burned: {self.calories_burned} kcal")
+
+    def check_notifications(self, app):
+        return self.fleet.check_notifications(app, [self.index])
+
+    def track_workout(self, activity, duration_minutes):
+        return self.fleet.track_workout(activity, duration_minutes, [self.index])
+
+    def __repr__(self):
+        kind = "FitnessSmartwatch" if self.is_fitness else "Smartwatch"
+        state = "on" if self.is_on else "off"
+        return f"<{kind} #{self.index}: {self.brand} {self.model}, {state}>"
+
+
+if __name__ == "__main__":
+    # Creating Objects (Instances)
+    watch1 = Smartwatch("Apple", "Watch Series 8", 1.9, 18)
+    watch2 = FitnessSmartwatch("Garmin", "Forerunner 255", 1.3, 24, True, 0)
+
+    # Using the Objects
+    print("=== Standard Smartwatch ===")
+    watch1.toggle_power()  # Turn on
+    watch1.info()
+    watch1.check_notifications("Messages")
+    watch1.toggle_power()  # Turn off
+    watch1.info()  # Should show powered-off message
+
+    print("\n=== Fitness Smartwatch ===")
+    watch2.toggle_power()  # Turn on
+    watch2.info()
+    watch2.check_notifications("Strava")
+    watch2.track_workout("Running", 30)
+    watch2.info()  # Show updated steps and calories
+    watch2.track_workout("Cycling", -5)  # Test error handling
+    watch2.toggle_power()  # Turn off
+
+    # Simulating a whole fleet: one call per operation instead of one per watch
+    print("\n=== Smartwatch Fleet ===")
+    n = 1_000_000
+    rng = np.random.default_rng(0)
+    fleet = SmartwatchFleet()
+    start = time.perf_counter()
+    fleet.add(watch1)
+    fleet.add(watch2)
+    fleet.add_many(rng.choice(["Apple", "Garmin", "Fitbit", "Samsung"], n),
+                   rng.choice(["Series 8", "Forerunner 255", "Charge 6", "Galaxy Watch 6"], n),
+                   rng.uniform(1.2, 2.0, n), rng.integers(18, 72, n),
+                   fitness=rng.random(n) < 0.6, heart_rate_monitor=True)
+    print(fleet.toggle_power(rng.random(fleet.size) < 0.8))  # Turn on about 80% of the fleet
+    print(fleet.check_notifications("Strava"))
+    print(fleet.track_workout("Running", rng.uniform(-5, 60, fleet.size)))  # Some invalid durations
+    print(fleet.summary())
+    print(f"Simulated {fleet.size:,} watches in {time.perf_counter() - start:.2f}s")
+    print(fleet[1])
+    fleet[1].info()
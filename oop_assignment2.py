@@ -1,5 +1,12 @@
+import os
+import time
+
+import numpy as np
+
 # Base class representing a generic animal in a zoo
 class ZooAnimal:
+    __slots__ = ("name", "species", "age", "is_awake")  # No per-object __dict__
+
     # Constructor to initialize common attributes
     def __init__(self, name, species, age):
         self.name = name            # Name of the animal (e.g., "Leo")
@@ -32,6 +39,14 @@ class ZooAnimal:
 
 # Child class for a terrestrial animal (e.g., Lion)
 class Lion(ZooAnimal):
+    __slots__ = ("mane_color",)
+
+    # Event text, shared by the methods below and by ZooSimulation
+    trait = "mane_color"
+    move_text = "is prowling with its {} mane!"
+    sound_text = "roars loudly: ROAR!"
+    cannot_move, cannot_sound = "move", "roar"
+
     # Constructor with additional attribute
     def __init__(self, name, age, mane_color):
         super().__init__(name, "Lion", age)
@@ -40,20 +55,28 @@ class Lion(ZooAnimal):
     # Implementation of move method
     def move(self):
         if not self.is_awake:
-            print(f" {self.name} the Lion is asleep and cannot move.")
+            print(f" {self.name} the Lion is asleep and cannot {self.cannot_move}.")
             return
-        print(f" {self.name} the Lion is prowling with its {self.mane_color} mane!")
+        print(f" {self.name} the Lion {self.move_text.format(self.mane_color)}")
 
     # Implementation of make_sound method
     def make_sound(self):
         if not self.is_awake:
-            print(f" {self.name} the Lion is asleep and cannot roar.")
+            print(f" {self.name} the Lion is asleep and cannot {self.cannot_sound}.")
             return
-        print(f" {self.name} the Lion roars loudly: ROAR!")
+        print(f" {self.name} the Lion {self.sound_text}")
 
 
 # Child class for an avian animal (e.g., Parrot)
 class Parrot(ZooAnimal):
+    __slots__ = ("feather_color",)
+
+    # Event text, shared by the methods below and by ZooSimulation
+    trait = "feather_color"
+    move_text = "is flying with {} feathers!"
+    sound_text = "squawks: SQUAWK!"
+    cannot_move, cannot_sound = "fly", "squawk"
+
     # Constructor with additional attribute
     def __init__(self, name, age, feather_color):
         super().__init__(name, "Parrot", age)
@@ -62,20 +85,28 @@ class Parrot(ZooAnimal):
     # Implementation of move method
     def move(self):
         if not self.is_awake:
-            print(f" {self.name} the Parrot is asleep and cannot fly.")
+            print(f" {self.name} the Parrot is asleep and cannot {self.cannot_move}.")
             return
-        print(f" {self.name} the Parrot is flying with {self.feather_color} feathers!")
+        print(f" {self.name} the Parrot {self.move_text.format(self.feather_color)}")
 
     # Implementation of make_sound method
     def make_sound(self):
         if not self.is_awake:
-            print(f" {self.name} the Parrot is asleep and cannot squawk.")
+            print(f" {self.name} the Parrot is asleep and cannot {self.cannot_sound}.")
             return
-        print(f" {self.name} the Parrot squawks: SQUAWK!")
+        print(f" {self.name} the Parrot {self.sound_text}")
 
 
 # Child class for an aquatic animal (e.g., Dolphin)
 class Dolphin(ZooAnimal):
+    __slots__ = ("fin_size",)
+
+    # Event text, shared by the methods below and by ZooSimulation
+    trait = "fin_size"
+    move_text = "is leaping with a {} fin!"
+    sound_text = "clicks: CLICK-CLICK!"
+    cannot_move, cannot_sound = "swim", "click"
+
     # Constructor with additional attribute
     def __init__(self, name, age, fin_size):
         super().__init__(name, "Dolphin", age)
@@ -84,38 +115,204 @@ class Dolphin(ZooAnimal):
     # Implementation of move method
     def move(self):
         if not self.is_awake:
-            print(f" {self.name} the Dolphin is asleep and cannot swim.")
+            print(f" {self.name} the Dolphin is asleep and cannot {self.cannot_move}.")
             return
-        print(f" {self.name} the Dolphin is leaping with a {self.fin_size} fin!")
+        print(f" {self.name} the Dolphin {self.move_text.format(self.fin_size)}")
 
     # Implementation of make_sound method
     def make_sound(self):
         if not self.is_awake:
-            print(f" {self.name} the Dolphin is asleep and cannot click.")
+            print(f" {self.name} the Dolphin is asleep and cannot {self.cannot_sound}.")
             return
-        print(f" {self.name} the Dolphin clicks: CLICK-CLICK!")
-
-
-# Creating a list of zoo animals (polymorphism in action)
-zoo_animals = [
-    Lion("Leo", 5, "golden"),
-    Parrot("Polly", 2, "red"),
-    Dolphin("Flipper", 3, "large")
-]
-
-# Demonstrating polymorphism by iterating over animals
-print("=== Zoo Animal Behaviors ===")
-for animal in zoo_animals:
-    animal.info()           # Display animal details
-    animal.move()           # Call move method (different for each subclass)
-    animal.make_sound()     # Call make_sound method (different for each subclass)
-    print()                 # Empty line for readability
-
-# Demonstrate awake/asleep state
-print("=== Testing Sleep State ===")
-zoo_animals[0].toggle_awake()  # Put Leo to sleep
-zoo_animals[0].info()          # Should show asleep message
-zoo_animals[0].move()          # Should show asleep message
-zoo_animals[0].make_sound()    # Should show asleep message
-zoo_animals[0].toggle_awake()  # Wake Leo up
-zoo_animals[0].move()          # Should now work
\ No newline at end of file
+        print(f" {self.name} the Dolphin {self.sound_text}")
+
+
+# Text of each species' events, so the engine can build them for a whole group at once:
+# (trait attribute, move text before/after the trait, sound text, verb when asleep for move / sound)
+def species_events(cls):
+    before, after = cls.move_text.split("{}")
+    return (cls.trait, f" the {cls.__name__} {before}", after, f" the {cls.__name__} {cls.sound_text}",
+            cls.cannot_move, cls.cannot_sound)
+
+
+SPECIES_EVENTS = {cls: species_events(cls) for cls in (Lion, Parrot, Dolphin)}
+
+
+# All animals of one species, one array per attribute; the arrays double in
+# capacity when full, so adding n animals one by one is O(n)
+class SpeciesGroup:
+    __slots__ = ("cls", "size", "_names", "_ages", "_traits", "_is_awake")
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.size = 0
+        self._names = np.empty(0, dtype=object)
+        self._ages = np.empty(0, dtype=np.int16)
+        self._traits = np.empty(0, dtype=object)
+        self._is_awake = np.empty(0, dtype=bool)
+
+    # Views of the filled part of each array
+    names = property(lambda self: self._names[:self.size])
+    ages = property(lambda self: self._ages[:self.size])
+    traits = property(lambda self: self._traits[:self.size])
+    is_awake = property(lambda self: self._is_awake[:self.size])
+
+    def _grow(self, capacity):
+        for attr in ("_names", "_ages", "_traits", "_is_awake"):
+            old = getattr(self, attr)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, attr, new)
+
+    def extend(self, names, ages, traits, is_awake=True):
+        end = self.size + len(names)
+        if end > len(self._names):
+            self._grow(max(end, 2 * len(self._names)))
+        self._names[self.size:end] = np.asarray(names, dtype=object)
+        self._ages[self.size:end] = ages
+        self._traits[self.size:end] = traits
+        self._is_awake[self.size:end] = is_awake
+        self.size = end
+
+
+# Buffered event log: lines are collected and written in large blocks
+class EventLog:
+    def __init__(self, out, buffer_lines=100_000):
+        self.out = out
+        self.buffer_lines = buffer_lines
+        self.blocks = []
+        self.pending = 0
+        self.lines = 0
+
+    def extend(self, lines):
+        if len(lines):
+            self.blocks.append(lines)
+            self.pending += len(lines)
+            if self.pending >= self.buffer_lines:
+                self.flush()
+
+    def flush(self):
+        if self.blocks:
+            lines = np.concatenate(self.blocks)
+            self.out.write("\n".join(lines) + "\n")
+            self.lines += len(lines)
+            self.blocks, self.pending = [], 0
+        self.out.flush()
+
+
+# Tick-based simulation of many animals, processed one species at a time
+class ZooSimulation:
+    """Each tick, every animal may toggle awake/asleep (with probability
+    toggle_rate), then moves and makes its sound, or reports that it can't
+    because it is asleep. Every step is a handful of array operations per
+    species instead of method calls per animal. Events of one tick are
+    logged species by species, in the order animals were added.
+    """
+
+    def __init__(self, animals=(), toggle_rate=0.1, seed=0):
+        self.toggle_rate = toggle_rate
+        self.rng = np.random.default_rng(seed)
+        self.groups = {cls: SpeciesGroup(cls) for cls in SPECIES_EVENTS}
+        self.ticks = 0
+        for animal in animals:
+            self.add(animal)
+
+    def _group(self, cls):
+        if cls not in self.groups:
+            known = ", ".join(c.__name__ for c in SPECIES_EVENTS)
+            raise TypeError(f"ZooSimulation can't simulate {cls.__name__} animals (only {known})")
+        return self.groups[cls]
+
+    def add(self, animal):
+        """Copy a Lion, Parrot or Dolphin object into the simulation"""
+        group = self._group(type(animal))
+        group.extend([animal.name], animal.age, getattr(animal, SPECIES_EVENTS[type(animal)][0]), animal.is_awake)
+
+    def add_many(self, cls, names, ages, traits):
+        """Add len(names) awake animals of one species (traits may be one value for all)"""
+        self._group(cls).extend(names, ages, traits)
+
+    def __len__(self):
+        return sum(len(group.names) for group in self.groups.values())
+
+    def tick(self, log=None):
+        """Advance one tick; returns event counts (and writes the events to log, an EventLog)"""
+        counts = {"toggled": 0, "moved": 0, "sounds": 0, "asleep": 0}
+        for cls, group in self.groups.items():
+            if not len(group.names):
+                continue
+            _, before, after, sound, cannot_move, cannot_sound = SPECIES_EVENTS[cls]
+            species = cls.__name__
+            toggled = self.rng.random(len(group.names)) < self.toggle_rate
+            awake = group.is_awake
+            awake ^= toggled
+            counts["toggled"] += int(toggled.sum())
+            counts["moved"] += int(awake.sum())
+            counts["sounds"] += int(awake.sum())
+            counts["asleep"] += int((~awake).sum())
+            if log is None:
+                continue
+            status = np.where(awake[toggled], " is now awake.", " is now asleep.").astype(object)
+            log.extend(" " + group.names[toggled] + f" the {species}" + status)
+            names, traits = group.names[awake], group.traits[awake].astype(str).astype(object)
+            log.extend(" " + names + before + traits + after)
+            log.extend(" " + names + sound)
+            sleeping = group.names[~awake]
+            log.extend(" " + sleeping + f" the {species} is asleep and cannot {cannot_move}.")
+            log.extend(" " + sleeping + f" the {species} is asleep and cannot {cannot_sound}.")
+        self.ticks += 1
+        return counts
+
+    def run(self, ticks, out=None, buffer_lines=100_000):
+        """Run `ticks` ticks, logging events to the file `out` if given; returns totals and ticks/second"""
+        log = EventLog(out, buffer_lines) if out is not None else None
+        totals = {"toggled": 0, "moved": 0, "sounds": 0, "asleep": 0}
+        start = time.perf_counter()
+        for _ in range(ticks):
+            for key, count in self.tick(log).items():
+                totals[key] += count
+        if log is not None:
+            log.flush()
+        seconds = time.perf_counter() - start
+        totals.update(animals=len(self), ticks=ticks, seconds=round(seconds, 3),
+                      ticks_per_second=round(ticks / seconds, 1) if seconds else float("inf"),
+                      logged_lines=log.lines if log is not None else 0)
+        return totals
+
+
+if __name__ == "__main__":
+    # Creating a list of zoo animals (polymorphism in action)
+    zoo_animals = [
+        Lion("Leo", 5, "golden"),
+        Parrot("Polly", 2, "red"),
+        Dolphin("Flipper", 3, "large")
+    ]
+
+    # Demonstrating polymorphism by iterating over animals
+    print("=== Zoo Animal Behaviors ===")
+    for animal in zoo_animals:
+        animal.info()           # Display animal details
+        animal.move()           # Call move method (different for each subclass)
+        animal.make_sound()     # Call make_sound method (different for each subclass)
+        print()                 # Empty line for readability
+
+    # Demonstrate awake/asleep state
+    print("=== Testing Sleep State ===")
+    zoo_animals[0].toggle_awake()  # Put Leo to sleep
+    zoo_animals[0].info()          # Should show asleep message
+    zoo_animals[0].move()          # Should show asleep message
+    zoo_animals[0].make_sound()    # Should show asleep message
+    zoo_animals[0].toggle_awake()  # Wake Leo up
+    zoo_animals[0].move()          # Should now work
+
+    # Simulating a whole zoo: per-species arrays, buffered event log
+    print("\n=== Zoo Simulation ===")
+    n = 100_000
+    zoo = ZooSimulation(zoo_animals, toggle_rate=0.1, seed=0)
+    rng = np.random.default_rng(0)
+    zoo.add_many(Lion, [f"Lion{i}" for i in range(n)], rng.integers(1, 20, n), rng.choice(["golden", "dark"], n))
+    zoo.add_many(Parrot, [f"Parrot{i}" for i in range(n)], rng.integers(1, 60, n), rng.choice(["red", "green", "blue"], n))
+    zoo.add_many(Dolphin, [f"Dolphin{i}" for i in range(n)], rng.integers(1, 40, n), "large")
+    print(zoo.run(50))  # Counts only
+    with open(os.devnull, "w") as devnull:
+        print(zoo.run(5, out=devnull))  # Every event written, in large blocks
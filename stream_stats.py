@@ -0,0 +1,164 @@
+# Streaming descriptive statistics: the iris_analysis.py workflow for tables too big to load at once
+# Reads a CSV in chunks and keeps, per group and numeric column, mergeable running
+# count / mean / variance / min / max (Welford-Chan) plus a fixed-size sample for quantiles.
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 1_000_000
+SAMPLE_SIZE = 4096          # Values kept per group and column for quantiles (rank error ~1/sqrt of this)
+QUANTILES = (0.25, 0.5, 0.75)
+ALL = "(all)"               # Group label of the overall statistics
+
+
+class StreamingStats:
+    """Per-group count, mean, variance, min, max and approximate quantiles in one pass
+
+    update() folds in a chunk, merge() folds in another StreamingStats (e.g.
+    from another file or process); both use Chan et al.'s pairwise update of
+    (count, mean, M2), which stays accurate where the textbook
+    sum-of-squares formula cancels. Quantiles come from a uniform random
+    sample of sample_size values per group and column: every value gets a
+    random key and the smallest keys are kept, so samples merge too.
+    """
+
+    def __init__(self, by=None, columns=None, sample_size=SAMPLE_SIZE, seed=0):
+        self.by = by
+        self.columns = columns
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.count = self.mean = self.m2 = self.min = self.max = None
+        self.samples = {}   # column -> DataFrame of group, value, key
+
+    def _groups(self, chunk):
+        """Group labels for each row: the `by` column, plus ALL for the overall numbers"""
+        if self.by is None:
+            return [pd.Series(ALL, index=chunk.index)]
+        return [chunk[self.by].astype(object).where(chunk[self.by].notna(), "(missing)"),
+                pd.Series(ALL, index=chunk.index)]
+
+    def update(self, chunk):
+        if self.columns is None:
+            self.columns = [c for c in chunk.select_dtypes(include=[np.number]).columns if c != self.by]
+        values = chunk[self.columns].astype(float)
+        keys = self.rng.random(len(chunk))
+        for groups in self._groups(chunk):
+            grouped = values.groupby(groups.to_numpy(), sort=False)
+            count = grouped.count()
+            mean = grouped.mean()
+            # Sum of squared deviations from the chunk's own group mean
+            m2 = grouped.var(ddof=0) * count
+            self._combine(count, mean, m2.fillna(0), grouped.min(), grouped.max())
+            for column in self.columns:
+                sample = pd.DataFrame({"group": groups.to_numpy(), "value": values[column].to_numpy(),
+                                       "key": keys}).dropna(subset=["value"])
+                self._add_sample(column, sample)
+
+    def merge(self, other):
+        """Fold in statistics gathered separately over the same columns"""
+        self.columns = self.columns or other.columns
+        if other.count is not None:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        for column, sample in other.samples.items():
+            self._add_sample(column, sample)
+
+    def _combine(self, count, mean, m2, low, high):
+        if self.count is None:
+            self.count, self.mean, self.m2, self.min, self.max = count, mean, m2, low, high
+            return
+        index = self.count.index.union(count.index, sort=False)
+        n_a = self.count.reindex(index, fill_value=0)
+        n_b = count.reindex(index, fill_value=0)
+        mean_a = self.mean.reindex(index).fillna(0)
+        mean_b = mean.reindex(index).fillna(0)
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        share_b = (n_b / n.where(n > 0)).fillna(0)
+        self.mean = (mean_a + delta * share_b).where(n > 0)
+        self.m2 = (self.m2.reindex(index).fillna(0) + m2.reindex(index).fillna(0)
+                   + delta ** 2 * n_a * share_b)
+        self.count = n
+        self.min = pd.concat([self.min.reindex(index), low.reindex(index)]).groupby(level=0, sort=False).min()
+        self.max = pd.concat([self.max.reindex(index), high.reindex(index)]).groupby(level=0, sort=False).max()
+
+    def _add_sample(self, column, sample):
+        if column in self.samples:
+            sample = pd.concat([self.samples[column], sample], ignore_index=True)
+        rank = sample.groupby("group", sort=False)["key"].rank(method="first")
+        self.samples[column] = sample[rank <= self.sample_size].reset_index(drop=True)
+
+    def variance(self, ddof=1):
+        return self.m2 / (self.count - ddof).where(self.count > ddof)
+
+    def quantiles(self, qs=QUANTILES):
+        """Approximate quantiles: DataFrame indexed by (group, q), one column per numeric column"""
+        result = {}
+        for column in self.columns:
+            sample = self.samples.get(column)
+            if sample is None or sample.empty:
+                continue
+            result[column] = sample.groupby("group", sort=False)["value"].quantile(list(qs))
+        return pd.DataFrame(result)
+
+    def describe(self, qs=QUANTILES):
+        """Like DataFrame.describe() for each group: one row per (group, statistic)"""
+        if self.count is None:
+            return pd.DataFrame(columns=self.columns)
+        parts = {"count": self.count, "mean": self.mean, "std": self.variance() ** 0.5, "min": self.min}
+        quantiles = self.quantiles(qs)
+        for q in qs:
+            parts[f"{q:.0%}"] = quantiles.xs(q, level=1) if len(quantiles) else None
+        parts["max"] = self.max
+        table = pd.concat({name: part.reindex(self.count.index) for name, part in parts.items()
+                           if part is not None}, names=["statistic", self.by or "group"])
+        return table.swaplevel().sort_index(level=0, sort_remaining=False)
+
+    def group_means(self):
+        """Mean of every column per group, without the overall row"""
+        return self.mean.drop(index=ALL, errors="ignore")
+
+    def fill_missing(self, chunk):
+        """Mean imputation from the running means (overall, like fillna(df.mean()))"""
+        return chunk.fillna(self.mean.loc[ALL].to_dict())
+
+
+def read_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    return pd.read_csv(sys.stdin if path == "-" else path, chunksize=chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="One-pass grouped statistics for large CSV files")
+    parser.add_argument("csv", help="CSV file ('-' reads stdin)")
+    parser.add_argument("--group-by", help="categorical column to group by (e.g. Species)")
+    parser.add_argument("--columns", nargs="+", help="numeric columns (default: all numeric ones)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--sample-size", type=int, default=SAMPLE_SIZE,
+                        help="values kept per group and column for quantiles")
+    parser.add_argument("--fill-missing", metavar="OUT_CSV",
+                        help="after the pass, write a copy with missing values filled by the column means")
+    args = parser.parse_args(argv)
+
+    stats = StreamingStats(args.group_by, args.columns, args.sample_size)
+    rows = 0
+    for chunk in read_chunks(args.csv, args.chunksize):
+        stats.update(chunk)
+        rows += len(chunk)
+    print(f"{rows} rows read")
+    with pd.option_context("display.max_rows", None, "display.width", 120):
+        print(stats.describe())
+
+    if args.fill_missing:
+        if args.csv == "-":
+            parser.error("--fill-missing needs a file it can read twice")
+        first = True
+        for chunk in read_chunks(args.csv, args.chunksize):
+            stats.fill_missing(chunk).to_csv(args.fill_missing, mode="w" if first else "a",
+                                             header=first, index=False)
+            first = False
+        print(f"Mean-filled copy written to {args.fill_missing}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+# The scripts are run from their own folders and import their neighbours by name
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'CORD19_Analysis'))
@@ -0,0 +1,31 @@
+import io
+
+import basic_calculator_program as calculator
+
+
+def _bulk(tmp_path, text, chunk_size=calculator.CHUNK_SIZE):
+    path = tmp_path / 'records.txt'
+    path.write_text(text)
+    out = io.StringIO()
+    total, errors = calculator.bulk(str(path), out, chunk_size)
+    return out.getvalue().splitlines(), total, errors
+
+
+def test_too_many_fields_is_reported_per_line(tmp_path):
+    lines, total, errors = _bulk(tmp_path, "1 + 2\n7 * 8 9\n6 / 3\n")
+    assert lines == ["1.0 + 2.0 = 3.0", f"7 * 8 9 = {calculator.INVALID_INPUT}", "6.0 / 3.0 = 2.0"]
+    assert (total, errors) == (3, 1)
+
+
+def test_stray_quote_is_an_invalid_number(tmp_path):
+    lines, total, errors = _bulk(tmp_path, '1 + "2\n"3 * 4\n5 - 1\n')
+    assert lines == ['1.0 + "2 = Error: Invalid number.', '"3 * 4.0 = Error: Invalid number.', "5.0 - 1.0 = 4.0"]
+    assert (total, errors) == (3, 2)
+
+
+def test_malformed_lines_in_every_chunk(tmp_path):
+    text = "4\n\n1 + 2\n3 -\n2 * 2 * 2\n0.1 + 0.2\n"
+    whole = _bulk(tmp_path, text)
+    assert whole[0] == [f"4 = {calculator.INVALID_INPUT}", "1.0 + 2.0 = 3.0", f"3 - = {calculator.INVALID_INPUT}",
+                        f"2 * 2 * 2 = {calculator.INVALID_INPUT}", "0.1 + 0.2 = 0.30000000000000004"]
+    assert _bulk(tmp_path, text, chunk_size=2) == whole
@@ -0,0 +1,21 @@
+from collections import Counter
+
+import pandas as pd
+
+import dates
+
+
+def test_out_of_range_years_become_nat():
+    formats = Counter()
+    values = pd.Series(['1600', '0000', '2999', '1500-01-01', '2020', '2020-03-01'])
+    parsed = dates.PublishTimeParser().parse(values, formats)
+    assert parsed.dtype == 'datetime64[ns]'
+    assert parsed.iloc[:4].isna().all()
+    assert list(parsed.iloc[4:]) == [pd.Timestamp('2020-01-01'), pd.Timestamp('2020-03-01')]
+    assert formats[dates.INVALID] == 4
+
+
+def test_mixed_format_out_of_range_becomes_nat():
+    parsed = dates.PublishTimeParser().parse(pd.Series(['March 1600', 'March 2020']))
+    assert pd.isna(parsed.iloc[0])
+    assert parsed.iloc[1] == pd.Timestamp('2020-03-01')
@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+
+import analysis
+import incremental
+import store
+import synthetic_metadata
+
+
+@pytest.fixture
+def metadata(tmp_path):
+    """(first part, whole file): the first part's bytes are a prefix of the whole file"""
+    source = tmp_path / 'generated.csv'
+    synthetic_metadata.write_metadata(str(source), 4000, seed=1)
+    df = pd.read_csv(source, dtype=str, keep_default_na=False)
+    whole = tmp_path / 'whole.csv'
+    df.to_csv(whole, index=False)
+    first = tmp_path / 'first.csv'
+    df.head(2500).to_csv(first, index=False)
+    return first, whole
+
+
+def _run(folder, input_path, fmt):
+    output = folder / f'{store.CLEANED_BASE}.{fmt}'
+    args = analysis.parse_args(['--input', str(input_path), '--incremental', '--format', fmt,
+                                '--output', str(output), '--state', str(folder / 'state.json')])
+    return analysis.run_incremental(args)
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet'])
+def test_interrupted_append_is_not_duplicated(tmp_path, metadata, monkeypatch, fmt):
+    first, whole = metadata
+    (tmp_path / 'once').mkdir()
+    expected_rows = _run(tmp_path / 'once', whole, fmt)[0].clean_rows
+    assert len(store.load_cleaned(folder=tmp_path / 'once')) == expected_rows
+
+    folder = tmp_path / 'resumed'
+    folder.mkdir()
+    input_path = folder / 'metadata.csv'
+    input_path.write_bytes(first.read_bytes())
+    _run(folder, input_path, fmt)
+    input_path.write_bytes(whole.read_bytes())
+
+    # The appended rows are written, then the run dies before its state is saved
+    def crash(*args, **kwargs):
+        raise KeyboardInterrupt
+    with monkeypatch.context() as m:
+        m.setattr(incremental, 'save_state', crash)
+        with pytest.raises(KeyboardInterrupt):
+            _run(folder, input_path, fmt)
+    output = str(folder / f'{store.CLEANED_BASE}.{fmt}')
+    assert len(store.delta_files(output)) == 1
+    assert incremental.load_state(str(folder / 'state.json'))['deltas'] == 0
+
+    stats, _ = _run(folder, input_path, fmt)
+    assert stats.clean_rows == expected_rows
+    assert len(store.load_cleaned(folder=folder)) == expected_rows
+
+
+def test_append_without_kept_rows_skips_full_rebuilds(tmp_path, monkeypatch):
+    source = tmp_path / 'generated.csv'
+    synthetic_metadata.write_metadata(str(source), 600, seed=4)
+    df = pd.read_csv(source, dtype=str, keep_default_na=False)
+    input_path = tmp_path / 'metadata.csv'
+    df.head(500).to_csv(input_path, index=False)
+    published = []
+    monkeypatch.setattr(analysis.snapshot, 'publish', lambda folder, **kwargs: published.append(folder))
+    monkeypatch.setattr(analysis.search_index, 'build', lambda folder: published.append(folder))
+
+    args = analysis.parse_args(['--input', str(input_path), '--incremental', '--format', 'csv',
+                                '--output', str(tmp_path / 'cleaned_metadata.csv'),
+                                '--state', str(tmp_path / 'state.json')])
+    analysis.refresh_outputs(args, analysis.run_incremental(args)[1])
+    assert len(published) == 2
+
+    # Appended rows without a title are all dropped, so nothing the rebuilds read changed
+    untitled = df.tail(100).assign(title='')
+    untitled.to_csv(input_path, mode='a', header=False, index=False)
+    _, writer = analysis.run_incremental(args)
+    assert writer.append and writer.rows == 0
+    analysis.refresh_outputs(args, writer)
+    assert len(published) == 2
+
+    df.tail(100).to_csv(input_path, mode='a', header=False, index=False)
+    analysis.refresh_outputs(args, analysis.run_incremental(args)[1])
+    assert len(published) == 4
+
+
+def test_edit_in_the_middle_of_processed_rows_rebuilds(tmp_path, metadata, monkeypatch, capsys):
+    monkeypatch.setattr(incremental, 'FINGERPRINT_BLOCK', 4096)   # Many checkpoints on a small file
+    first, whole = metadata
+    input_path = tmp_path / 'metadata.csv'
+    input_path.write_bytes(first.read_bytes())
+    _run(tmp_path, input_path, 'csv')
+
+    # Appending reuses the checked blocks and still fingerprints every byte
+    input_path.write_bytes(whole.read_bytes())
+    _run(tmp_path, input_path, 'csv')
+    state = incremental.load_state(str(tmp_path / 'state.json'))
+    assert state['fingerprint'] == incremental.fingerprint(str(input_path), state['offset'])
+    assert len(state['fingerprint']) > 2
+
+    # Same size, one byte changed far from both ends of the processed part
+    data = bytearray(whole.read_bytes())
+    middle = len(data) // 2
+    data[middle] = ord('x') if data[middle] != ord('x') else ord('y')
+    input_path.write_bytes(bytes(data))
+    capsys.readouterr()
+    stats, _ = _run(tmp_path, input_path, 'csv')
+    assert "Full rebuild (already-processed rows changed)" in capsys.readouterr().out
+    assert stats.rows == 4000
@@ -0,0 +1,34 @@
+import pytest
+
+import oop_assignment1 as watches
+
+
+def _fleet():
+    fleet = watches.SmartwatchFleet(capacity=8)
+    fleet.add_many(["Apple", "Fitbit"], ["Watch", "Charge"], [1.9, 1.0], [18, 120], fitness=[False, True])
+    return fleet
+
+
+@pytest.mark.parametrize("devices", [[5], [2], [-3], [0, 7]])
+def test_out_of_range_indices_are_rejected(devices):
+    fleet = _fleet()
+    with pytest.raises(IndexError):
+        fleet.toggle_power(devices)
+    assert not fleet.is_on.any()   # Padding slots included
+
+
+def test_negative_index_and_mask_select_like_getitem():
+    fleet = _fleet()
+    assert fleet.toggle_power([-1]) == {"toggled": 1, "now_on": 1, "now_off": 0}
+    assert fleet[-1].is_on and not fleet[0].is_on
+    with pytest.raises(IndexError):
+        fleet.toggle_power([True, False, True])
+
+
+def test_duplicates_apply_once_per_entry():
+    fleet = _fleet()
+    fleet.toggle_power([0, 0, 1])
+    assert not fleet[0].is_on and fleet[1].is_on
+    result = fleet.track_workout("run", 10, [1, 1])
+    assert result["tracked"] == 2
+    assert fleet[1].calories_burned == 200
@@ -0,0 +1,44 @@
+import contextlib
+import io
+
+import pytest
+
+import oop_assignment2 as zoo
+
+
+def test_simulation_logs_what_the_animals_print():
+    animals = [zoo.Lion("Leo", 5, "golden"), zoo.Parrot("Polly", 2, "red"),
+               zoo.Dolphin("Flipper", 3, "large"), zoo.Lion("Nala", 4, "dark")]
+    animals[3].is_awake = False
+    printed = io.StringIO()
+    with contextlib.redirect_stdout(printed):
+        for cls in zoo.SPECIES_EVENTS:
+            for animal in (a for a in animals if type(a) is cls):
+                animal.move()
+            for animal in (a for a in animals if type(a) is cls):
+                animal.make_sound()
+
+    simulation = zoo.ZooSimulation(animals, toggle_rate=0)
+    out = io.StringIO()
+    log = zoo.EventLog(out)
+    simulation.tick(log)
+    log.flush()
+    assert sorted(out.getvalue().splitlines()) == sorted(printed.getvalue().splitlines())
+
+
+def test_animals_added_one_by_one():
+    simulation = zoo.ZooSimulation((zoo.Parrot(f"Parrot{i}", 2, "blue") for i in range(1000)), toggle_rate=0)
+    simulation.add_many(zoo.Parrot, ["Kiwi", "Mango"], 3, "green")
+    group = simulation.groups[zoo.Parrot]
+    assert len(simulation) == 1002
+    assert list(group.names[-3:]) == ["Parrot999", "Kiwi", "Mango"]
+    assert list(group.traits[-3:]) == ["blue", "green", "green"]
+    assert simulation.tick()["moved"] == 1002
+
+
+def test_unknown_species_is_rejected():
+    class WhiteLion(zoo.Lion):
+        __slots__ = ()
+
+    with pytest.raises(TypeError, match="WhiteLion"):
+        zoo.ZooSimulation([WhiteLion("Snow", 3, "white")])
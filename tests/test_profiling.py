@@ -0,0 +1,51 @@
+import json
+import pickle
+import pstats
+import time
+
+import profiling
+
+
+def _busy_worker_stage():
+    time.sleep(0.05)
+    return sum(range(10000))
+
+
+def _worker(cprofile):
+    """A worker's profiler, after the round trip through a process pool"""
+    worker = profiling.Profiler(cprofile)
+    with worker.stage('plot_worker'):
+        _busy_worker_stage()
+    worker.stop()
+    return pickle.loads(pickle.dumps(worker))
+
+
+def _parent():
+    parent = profiling.Profiler(cprofile=True)
+    with parent.stage('aggregation'):
+        sum(range(1000))
+    return parent
+
+
+def test_worker_profile_is_merged_into_the_dump(tmp_path):
+    parent = _parent()
+    parent.merge(_worker(True))
+    parent.merge(_worker(True))
+    parent.stop()
+    report = json.loads(open(parent.save(str(tmp_path))).read())
+
+    assert report['slowest_stage'] == 'plot_worker'
+    stats = pstats.Stats(report['cprofile_dump'])
+    calls = {func[2]: counts[1] for func, counts in stats.stats.items()}
+    assert calls['_busy_worker_stage'] == 2
+
+
+def test_slowest_stage_without_profile_falls_back(tmp_path, capsys):
+    parent = _parent()
+    parent.merge(_worker(False))
+    parent.stop()
+    report = json.loads(open(parent.save(str(tmp_path))).read())
+
+    assert report['cprofile_dump'].endswith('analysis_profile_aggregation.prof')
+    assert 'plot_worker' in report['cprofile_note']
+    assert 'plot_worker' in capsys.readouterr().out
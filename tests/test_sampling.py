@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+import analysis
+import sampling
+import synthetic_metadata
+
+
+def _chunks(df, size):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+def _stratified(df, size, chunksize, seed=0):
+    strata = sampling.count_strata(chunk['group'] for chunk in _chunks(df, chunksize))
+    reservoir = sampling.Reservoir(size, seed=seed, strata=strata)
+    held = 0
+    for chunk in _chunks(df, chunksize):
+        reservoir.update(chunk, chunk['group'])
+        held = max(held, len(reservoir.rows))
+    return reservoir.result(), held
+
+
+def test_stratified_sample_holds_only_its_size():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'value': np.arange(20000), 'group': rng.integers(0, 50, 20000)})
+    sample, held = _stratified(df, 200, 1000)
+
+    assert len(sample) == 200
+    assert held <= 200
+    expected = sampling.allocation(200, df['group'].astype(str).value_counts().to_dict())
+    assert sample['group'].astype(str).value_counts().to_dict() == {k: v for k, v in expected.items() if v}
+
+    # The rows with the smallest keys in each stratum, whatever the chunk size
+    keys = np.random.default_rng(0).random(len(df))
+    ranked = df.assign(key=keys).sort_values('key')
+    best = ranked.groupby(ranked['group'].astype(str)).cumcount() < ranked['group'].astype(str).map(expected)
+    assert sorted(sample['value']) == sorted(ranked.loc[best, 'value'])
+    assert _stratified(df, 200, 333)[0].equals(sample)
+
+
+def test_stratified_run_and_memory_estimate(tmp_path, capsys):
+    input_path = tmp_path / 'metadata.csv'
+    synthetic_metadata.write_metadata(str(input_path), 3000, seed=2)
+    args = analysis.parse_args(['--input', str(input_path), '--format', 'csv', '--output', str(tmp_path / 'out.csv'),
+                                '--sample', '400', '--stratify', 'year', '--chunksize', '500',
+                                '--limit', '100', '--memory-budget', '1000'])
+    stats, _ = analysis.run(args)
+    assert stats.rows == 400
+    # --limit doesn't cap the rows a sample holds
+    assert "Estimated memory for 900 rows" in capsys.readouterr().out
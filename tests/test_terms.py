@@ -0,0 +1,58 @@
+import pandas as pd
+
+import analysis
+import synthetic_metadata
+import terms
+
+
+def _term_stats(tmp_path, input_path, name, *flags):
+    output = tmp_path / f'{name}.csv'
+    args = analysis.parse_args(['--input', str(input_path), '--format', 'csv', '--output', str(output),
+                                '--chunksize', '500', *flags])
+    stats, _ = analysis.run(args)
+    return stats.terms
+
+
+def _within_bounds(counts, exact):
+    """Every kept count is a lower bound short by at most its year's bound, and so is every dropped term"""
+    kept = counts.frame().set_index(['year', 'term'])
+    errors = counts.year_errors()
+    for (year, term), count in exact.items():
+        found = kept['count'].get((year, term), 0)
+        assert count - errors[year] <= found <= count
+    assert set(kept.index) <= set(exact.index)
+
+
+def test_serial_and_partitioned_term_tables_are_within_the_bound(tmp_path):
+    input_path = tmp_path / 'metadata.csv'
+    synthetic_metadata.write_metadata(str(input_path), 6000, seed=3)
+    serial = _term_stats(tmp_path, input_path, 'serial', '--stream')
+    partitioned = _term_stats(tmp_path, input_path, 'partitioned', '--workers', '4')
+
+    a = serial.frame().set_index(['year', 'term'])
+    b = partitioned.frame().set_index(['year', 'term'])
+    both = a[['count']].join(b[['count']], how='outer', lsuffix='_serial', rsuffix='_partitioned').fillna(0)
+    bound = [max(serial.year_errors()[year], partitioned.year_errors()[year]) for year, _ in both.index]
+    assert ((both['count_serial'] - both['count_partitioned']).abs() <= bound).all()
+    assert sorted(serial.year_errors()) == sorted(partitioned.year_errors())
+
+
+def test_counts_stay_bounded_and_within_the_error_of_exact_counts():
+    clean = pd.DataFrame({'year': [2020, 2020, 2021, 2021, 2022] * 400,
+                          'title': [f'virus study {i % 7} cohort{i % 97} site{i % 131}' for i in range(2000)]})
+    exact = terms.year_terms(clean)
+    whole = terms.TermCounts(error=0.05)   # 19 terms per year, far fewer than the vocabulary
+    whole.update(clean)
+    merged = terms.TermCounts(error=0.05)
+    for start in range(0, len(clean), 300):
+        part = terms.TermCounts(error=0.05)
+        part.update(clean.iloc[start:start + 300])
+        merged.merge(part)
+
+    for counts in (whole, merged):
+        assert all(len(sketch.counts) <= 19 for sketch in counts.sketches.years.values())
+        assert max(counts.year_errors().values()) > 0
+        _within_bounds(counts, exact)
+    # The saved table carries each year's bound, and the state round-trips
+    assert (merged.frame()['error'] == merged.frame()['year'].map(merged.year_errors())).all()
+    pd.testing.assert_frame_equal(terms.TermCounts.from_state(merged.to_state()).frame(), merged.frame())
@@ -0,0 +1,160 @@
+import functools
+import threading
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import ubuntu_image_fetcher as fetcher
+
+IMAGE = b"\x89PNG original image bytes"
+OTHER = b"\x89PNG another image"
+ETAG = '"v1"'
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    """Serves IMAGE with its ETag, answering conditional and Range requests like a real server"""
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        start = None
+        ranged = self.headers.get("Range", "")
+        # If-Range: a validator that no longer matches gets the whole image
+        if ranged.startswith("bytes=") and self.headers.get("If-Range", ETAG) == ETAG:
+            start = int(ranged[len("bytes="):].split("-", 1)[0])
+        if start is not None and start >= len(IMAGE):
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(IMAGE)}")
+            self.end_headers()
+            return
+        body = IMAGE if start is None else IMAGE[start:]
+        self.send_response(200 if start is None else 206)
+        if start is not None:
+            self.send_header("Content-Range", f"bytes {start}-{len(IMAGE) - 1}/{len(IMAGE)}")
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _QuietDirectoryHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _serve(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def server():
+    server = _serve(_ImageHandler)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def url(server):
+    return f"http://127.0.0.1:{server.server_port}/logo.png"
+
+
+def _interrupted(folder, url, data, etag):
+    """Leave a .part file as a download cut short under the given ETag would"""
+    with open(fetcher.part_path(str(folder), url), "wb") as f:
+        f.write(data)
+    manifest = fetcher.Manifest(str(folder))
+    manifest.partial[url] = {"etag": etag, "last_modified": None}
+    manifest.save()
+
+
+def test_unchanged_image_is_revalidated(tmp_path, url):
+    assert fetcher.fetch_image(url, str(tmp_path), verbose=False).status == "saved"
+    assert fetcher.fetch_image(url, str(tmp_path), verbose=False).status == "unchanged"
+
+
+def test_overwritten_file_is_fetched_again(tmp_path, url):
+    assert fetcher.fetch_image(url, str(tmp_path), verbose=False).status == "saved"
+    (tmp_path / "logo.png").write_bytes(b"something else entirely")
+
+    result = fetcher.fetch_image(url, str(tmp_path), verbose=False)
+    assert result.status == "saved"
+    assert (tmp_path / "logo.png").read_bytes() == IMAGE
+    assert fetcher.fetch_image(url, str(tmp_path), verbose=False).status == "unchanged"
+
+
+def test_partial_download_is_resumed(tmp_path, server, url):
+    _interrupted(tmp_path, url, IMAGE[:10], ETAG)
+
+    result = fetcher.fetch_image(url, str(tmp_path), verbose=False)
+    assert result.status == "saved"
+    assert result.bytes == len(IMAGE) - 10
+    assert "resumed after 10 bytes" in result.message
+    assert server.requests[-1]["Range"] == "bytes=10-"
+    assert (tmp_path / "logo.png").read_bytes() == IMAGE
+    assert not list(tmp_path.glob("*.part"))
+    assert fetcher.Manifest(str(tmp_path)).partial == {}
+
+
+@pytest.mark.parametrize("data, etag, requests", [
+    (b"bytes of an older version", '"v0"', 1),      # Validator changed: If-Range gets a 200
+    (IMAGE + b" and more", ETAG, 2),                # Longer than the image: 416, then a plain GET
+])
+def test_stale_partial_download_restarts(tmp_path, server, url, data, etag, requests):
+    _interrupted(tmp_path, url, data, etag)
+
+    result = fetcher.fetch_image(url, str(tmp_path), verbose=False)
+    assert result.status == "saved"
+    assert result.bytes == len(IMAGE)
+    assert "resumed" not in result.message
+    assert "Range" in server.requests[0]
+    assert len(server.requests) == requests
+    assert (tmp_path / "logo.png").read_bytes() == IMAGE
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_batch_reports_each_url(tmp_path, capsys):
+    images = tmp_path / "site"
+    images.mkdir()
+    (images / "a.png").write_bytes(IMAGE)
+    (images / "b.png").write_bytes(IMAGE)   # Same content under another name
+    (images / "c.png").write_bytes(OTHER)
+    server = _serve(functools.partial(_QuietDirectoryHandler, directory=str(images)))
+    try:
+        base = f"http://127.0.0.1:{server.server_port}"
+        urls_file = tmp_path / "urls.txt"
+        urls_file.write_text(f"# batch\n{base}/a.png\n{base}/b.png\n\n{base}/c.png\n{base}/a.png\n{base}/missing.png\n")
+        urls = fetcher.read_urls(str(urls_file))
+        results = fetcher.fetch_all(urls, str(tmp_path / "out"), workers=4, per_host=2)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert [result.url for result in results] == urls
+    status = [result.status for result in results]
+    assert status[2] == "saved" and status[4] == "error"
+    assert "404" in results[4].message
+    # The copies of IMAGE race: the first one done is saved, the other name is its duplicate,
+    # and whichever a.png waits for the other is revalidated
+    assert sorted(status[i] for i in (0, 1, 3)) == ["duplicate", "saved", "unchanged"]
+    assert "unchanged" in (status[0], status[3])
+    expected_bytes = {"saved": len(IMAGE), "duplicate": len(IMAGE), "unchanged": 0}
+    assert [results[i].bytes for i in (0, 1, 3)] == [expected_bytes[status[i]] for i in (0, 1, 3)]
+    assert results[2].bytes == len(OTHER) and results[4].bytes == 0
+    assert all(result.seconds > 0 for result in results)
+    assert len(list((tmp_path / "out").glob("*.png"))) == 2
+
+    fetcher.print_summary(results)
+    out = capsys.readouterr().out
+    assert f"5 URLs, {2 * len(IMAGE) + len(OTHER)} bytes: 1 duplicate, 1 error, 2 saved, 1 unchanged" in out
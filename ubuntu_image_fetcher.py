@@ -1,8 +1,25 @@
 import requests
 import os
+import sys
+import time
+import argparse
+import json
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
 import hashlib
 
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 4
+CHUNK_SIZE = 64 * 1024
+INDEX_FILE = ".image_index.json"
+MANIFEST_FILE = ".image_manifest.json"
+
+# Outcome of one fetch, used for the end-of-run summary
+FetchResult = namedtuple("FetchResult", ["url", "status", "bytes", "seconds", "message"])
+
 def get_filename_from_url(url):
     """Extract filename from URL or generate one if missing"""
     parsed_url = urlparse(url)
@@ -19,53 +36,376 @@ def file_hash(filepath):
             sha256.update(chunk)
     return sha256.hexdigest()
 
-def fetch_image(url, folder="Fetched_Images"):
-    """Fetch a single image from a URL"""
-    try:
-        response = requests.get(url, timeout=10, stream=True)
-        response.raise_for_status()  # Check HTTP status codes
+class HashIndex:
+    """Persistent SHA256 -> filename index of a folder, so duplicate checks never re-read files
 
-        # Check content-type to ensure it's an image
-        content_type = response.headers.get("Content-Type", "")
-        if not content_type.startswith("image/"):
-            print(f"✗ Skipped: URL does not point to an image ({content_type})")
+    Entries remember each file's size and mtime; files that were added or
+    changed outside the fetcher are hashed once when the index is opened.
+    Safe to share between threads.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, INDEX_FILE)
+        self.lock = threading.Lock()
+        self.files = {}   # filename -> {"sha256", "size", "mtime"}
+        self.hashes = {}  # sha256 -> filename
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+        if not os.path.isdir(self.folder):
             return
+        for filename in os.listdir(self.folder):
+            filepath = os.path.join(self.folder, filename)
+            if filename in (INDEX_FILE, MANIFEST_FILE) or filename.endswith(".part") or not os.path.isfile(filepath):
+                continue
+            stat = os.stat(filepath)
+            entry = saved.get(filename)
+            if not entry or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+                entry = {"sha256": file_hash(filepath), "size": stat.st_size, "mtime": stat.st_mtime}
+            self.files[filename] = entry
+            self.hashes.setdefault(entry["sha256"], filename)
+
+    def claim(self, digest, filename):
+        """Return the file that already holds this content, or record filename as its home"""
+        with self.lock:
+            existing = self.hashes.get(digest)
+            if existing is not None:
+                return existing
+            old = self.files.pop(filename, None)
+            if old and self.hashes.get(old["sha256"]) == filename:
+                del self.hashes[old["sha256"]]
+            self.hashes[digest] = filename
+            self.files[filename] = {"sha256": digest, "size": None, "mtime": None}
+            return None
+
+    def digest(self, filename):
+        """SHA256 of the file as it is in the folder now, or None if it isn't there"""
+        with self.lock:
+            entry = self.files.get(filename)
+        return entry["sha256"] if entry else None
+
+    def saved(self, filename):
+        """Record size and mtime once the file is in place"""
+        stat = os.stat(os.path.join(self.folder, filename))
+        with self.lock:
+            self.files[filename].update(size=stat.st_size, mtime=stat.st_mtime)
+
+    def release(self, digest, filename):
+        """Undo a claim whose file never made it to disk"""
+        with self.lock:
+            if self.hashes.get(digest) == filename:
+                del self.hashes[digest]
+            self.files.pop(filename, None)
+
+    def save(self):
+        with self.lock:
+            os.makedirs(self.folder, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.files, f)
+            os.replace(tmp_path, self.path)
+
+class Manifest:
+    """Persistent record of every fetched URL: filename, ETag, Last-Modified, size and SHA256
+
+    Repeat fetches send the saved validators, so an unchanged image costs a
+    304 instead of its bytes. Downloads that were cut short are remembered
+    with the validator they started under, so the next fetch resumes them
+    with a Range request. Safe to share between threads.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, MANIFEST_FILE)
+        self.lock = threading.Lock()
+        self.url_locks = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+        self.images = saved.get("images", {})    # url -> {"filename", "etag", "last_modified", "size", "sha256"}
+        self.partial = saved.get("partial", {})  # url -> {"etag", "last_modified"} of the .part file's bytes
+
+    def url_lock(self, url):
+        """Lock held while a URL is fetched, so two threads never write the same .part file"""
+        with self.lock:
+            return self.url_locks.setdefault(url, threading.Lock())
+
+    def cached(self, url, index):
+        """The saved entry for url, if its file is still in the folder with the content it was fetched with
+
+        An entry whose file was deleted or overwritten since is dropped, so the
+        image is fetched in full instead of being declared up to date.
+        """
+        with self.lock:
+            entry = self.images.get(url)
+        if entry is None:
+            return None
+        if index.digest(entry["filename"]) == entry["sha256"]:
+            return entry
+        with self.lock:
+            if self.images.get(url) is entry:
+                del self.images[url]
+        return None
+
+    def record(self, url, filename, response, size, digest):
+        with self.lock:
+            self.images[url] = {"filename": filename, "etag": response.headers.get("ETag"),
+                                "last_modified": response.headers.get("Last-Modified"),
+                                "size": size, "sha256": digest}
+            self.partial.pop(url, None)
+
+    def start_partial(self, url, response):
+        with self.lock:
+            self.partial[url] = {"etag": response.headers.get("ETag"),
+                                 "last_modified": response.headers.get("Last-Modified")}
+
+    def resume_validator(self, url):
+        """If-Range value for the url's partial download (a strong ETag, else Last-Modified), or None"""
+        with self.lock:
+            partial = self.partial.get(url)
+        if not partial:
+            return None
+        etag = partial.get("etag")
+        if etag and not etag.startswith("W/"):  # Weak ETags can't be used with ranges
+            return etag
+        return partial.get("last_modified")
+
+    def drop_partial(self, url):
+        with self.lock:
+            self.partial.pop(url, None)
+
+    def save(self):
+        with self.lock:
+            if not (self.images or self.partial or os.path.exists(self.path)):
+                return  # Nothing fetched yet; don't create the folder just for an empty manifest
+            os.makedirs(self.folder, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"images": self.images, "partial": self.partial}, f)
+            os.replace(tmp_path, self.path)
 
-        # Prepare folder and filename
-        os.makedirs(folder, exist_ok=True)
-        filename = get_filename_from_url(url)
-        filepath = os.path.join(folder, filename)
+def make_session(workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST):
+    """Shared keep-alive session; at most per_host open connections to any one host"""
+    session = requests.Session()
+    # pool_block makes extra requests to a busy host wait for a free connection
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=per_host, pool_block=True)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
-        # Prevent duplicate downloads by comparing hashes
-        if os.path.exists(filepath):
-            existing_hash = file_hash(filepath)
-            new_hash = hashlib.sha256(response.content).hexdigest()
-            if existing_hash == new_hash:
-                print(f"✓ Duplicate detected: {filename} already exists, skipping.")
-                return
+def part_path(folder, url):
+    """Where a URL's body is downloaded to; the same path every run, so it can be resumed"""
+    return os.path.join(folder, hashlib.sha256(url.encode("utf-8")).hexdigest()[:16] + ".part")
 
-        # Save the image
-        with open(filepath, "wb") as f:
-            f.write(response.content)
+def content_range_start(response):
+    """First byte offset of a 206 response ('bytes START-END/TOTAL'), or None"""
+    value = response.headers.get("Content-Range", "")
+    try:
+        unit, span = value.split(" ", 1)
+        return int(span.split("-", 1)[0]) if unit == "bytes" else None
+    except ValueError:
+        return None
+
+def download_to_part(response, tmp_path, offset=0):
+    """Stream the body into tmp_path, after the first offset bytes already there; returns (sha256, size)
+
+    Bytes kept from an interrupted download are hashed from disk, so the
+    digest covers the whole image. If the transfer breaks, the file stays
+    for the next attempt to resume.
+    """
+    sha256 = hashlib.sha256()
+    size = offset
+    if offset:
+        with open(tmp_path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                sha256.update(chunk)
+    with open(tmp_path, "ab" if offset else "wb") as f:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            f.write(chunk)
+            sha256.update(chunk)
+            size += len(chunk)
+    return sha256.hexdigest(), size
+
+def fetch_image(url, folder="Fetched_Images", session=None, verbose=True, index=None, manifest=None):
+    """Fetch a single image from a URL and return a FetchResult"""
+    start = time.perf_counter()
+    own_index = index is None
+    own_manifest = manifest is None
+
+    def done(status, size, message):
+        if verbose:
+            print(message)
+        return FetchResult(url, status, size, time.perf_counter() - start, message)
+
+    try:
+        if manifest is None:
+            manifest = Manifest(folder)
+        with manifest.url_lock(url):
+            # Ask only for what we don't have: nothing if our copy is current, the rest of a cut-off download
+            headers = {}
+            if index is None:
+                index = HashIndex(folder)
+            cached = manifest.cached(url, index)
+            if cached and cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached and cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+            tmp_path = part_path(folder, url)
+            offset = os.path.getsize(tmp_path) if os.path.exists(tmp_path) else 0
+            validator = manifest.resume_validator(url)
+            if offset and validator:
+                # If-Range: the server sends the whole image instead if it changed since
+                headers.update({"Range": f"bytes={offset}-", "If-Range": validator})
+            else:
+                offset = 0
+
+            response = (session or requests).get(url, timeout=10, stream=True, headers=headers)
+            if response.status_code == 304:
+                response.close()
+                return done("unchanged", 0, f"✓ Not modified: {cached['filename']} is up to date, skipping.")
+            if response.status_code == 416 or (response.status_code == 206
+                                               and content_range_start(response) != offset):
+                # The partial file doesn't fit what the server has now; start over
+                response.close()
+                manifest.drop_partial(url)
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                headers = {key: value for key, value in headers.items() if key not in ("Range", "If-Range")}
+                response = (session or requests).get(url, timeout=10, stream=True, headers=headers)
+            response.raise_for_status()  # Check HTTP status codes
+            if response.status_code != 206:
+                offset = 0  # A full body, either asked for or because the image changed
+
+            # Check content-type to ensure it's an image
+            content_type = response.headers.get("Content-Type", "")
+            if not content_type.startswith("image/"):
+                response.close()
+                return done("skipped", 0, f"✗ Skipped: URL does not point to an image ({content_type})")
 
-        print(f"✓ Successfully fetched: {filename}")
-        print(f"✓ Image saved to {filepath}")
+            # Prepare folder and filename
+            os.makedirs(folder, exist_ok=True)
+            filename = get_filename_from_url(url)
+            filepath = os.path.join(folder, filename)
+
+            # Stream to the URL's .part file, hashing on the fly; keep it if the transfer breaks
+            if not offset:
+                manifest.start_partial(url, response)
+            try:
+                digest, size = download_to_part(response, tmp_path, offset)
+            except BaseException:
+                if manifest.resume_validator(url) is None:  # Can't be resumed safely
+                    manifest.drop_partial(url)
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                raise
+            received = size - offset
+            resumed = f" (resumed after {offset} bytes)" if offset else ""
+
+            # Prevent duplicate downloads: same content under any name is a lookup in the index
+            existing = index.claim(digest, filename)
+            if existing is not None:
+                os.remove(tmp_path)
+                manifest.record(url, existing, response, size, digest)
+                if existing == filename:
+                    return done("duplicate", received, f"✓ Duplicate detected: {filename} already exists, skipping.")
+                return done("duplicate", received, f"✓ Duplicate detected: {filename} has the same content as {existing}, skipping.")
+
+            # Move the image into place in one step
+            try:
+                os.replace(tmp_path, filepath)
+            except OSError:
+                index.release(digest, filename)
+                os.remove(tmp_path)
+                raise
+            index.saved(filename)
+            manifest.record(url, filename, response, size, digest)
+            if own_index:
+                index.save()
+
+            if verbose:
+                print(f"✓ Successfully fetched: {filename}")
+            return done("saved", received, f"✓ Image saved to {filepath}{resumed}")
 
     except requests.exceptions.RequestException as e:
-        print(f"✗ Connection error: {e}")
+        return done("error", 0, f"✗ Connection error: {e}")
     except Exception as e:
-        print(f"✗ An error occurred: {e}")
+        return done("error", 0, f"✗ An error occurred: {e}")
+    finally:
+        if own_manifest and manifest is not None:
+            manifest.save()
+
+def fetch_all(urls, folder="Fetched_Images", workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST):
+    """Fetch many URLs concurrently over one pooled session; results come back in input order"""
+    index = HashIndex(folder)
+    manifest = Manifest(folder)
+    try:
+        with make_session(workers, per_host) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda url: fetch_image(url, folder, session, False, index, manifest), urls))
+    finally:
+        index.save()
+        manifest.save()
+
+def read_urls(source):
+    """URLs from a file (one per line, '#' comments allowed) or '-' for stdin"""
+    f = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def print_summary(results):
+    """Per-URL status, size and latency, then totals"""
+    print(f"\n{'Status':<10} {'Bytes':>10} {'Latency':>9}  URL")
+    for result in results:
+        print(f"{result.status:<10} {result.bytes:>10} {result.seconds * 1000:>7.0f}ms  {result.url}")
+        if result.status == "error":
+            print(f"{'':<33}{result.message}")
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    total_bytes = sum(result.bytes for result in results)
+    print(f"\n{len(results)} URLs, {total_bytes} bytes: "
+          + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ubuntu Image Fetcher")
+    parser.add_argument("--urls-file", help="file with one URL per line ('-' reads stdin)")
+    parser.add_argument("--folder", default="Fetched_Images", help="where images are saved")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="concurrent downloads")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST,
+                        help="maximum open connections to a single host")
+    args = parser.parse_args(argv)
 
-def main():
     print("Welcome to the Ubuntu Image Fetcher")
     print("A tool for mindfully collecting images from the web\n")
 
-    urls = input("Please enter one or more image URLs (separated by commas): ").split(",")
+    if args.urls_file:
+        # Batch mode: fetch everything concurrently, then report
+        urls = read_urls(args.urls_file)
+        started = time.perf_counter()
+        results = fetch_all(urls, args.folder, args.workers, args.per_host)
+        print_summary(results)
+        print(f"Finished in {time.perf_counter() - started:.2f}s")
+    else:
+        urls = input("Please enter one or more image URLs (separated by commas): ").split(",")
 
-    for url in urls:
-        url = url.strip()
-        if url:  # Ignore empty strings
-            fetch_image(url)
+        index = HashIndex(args.folder)
+        manifest = Manifest(args.folder)
+        for url in urls:
+            url = url.strip()
+            if url:  # Ignore empty strings
+                fetch_image(url, args.folder, index=index, manifest=manifest)
+        index.save()
+        manifest.save()
 
     print("\nConnection strengthened. Community enriched.")
 